@@ -0,0 +1,72 @@
+"""Compare simpleSplit with the cached-width line breaker on large inputs.
+
+    python benchmarks/bench_linebreak.py [--words 100000] [--font path.ttf]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arabic_reshaper
+import reportlab
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from pdfbuilder import load_font
+from pdfbuilder.linebreak import WordWidthCache, break_lines
+
+WORDS = "السلام عليكم ورحمة الله وبركاته هذا نص تجريبي لقياس سرعة التفاف الأسطر في المستندات العربية الطويلة".split()
+
+
+def make_paragraph(word_count, seed=0):
+    rng = random.Random(seed)
+    return arabic_reshaper.reshape(' '.join(rng.choice(WORDS) for _ in range(word_count)))
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--font", default=os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf"))
+    parser.add_argument("--size", type=int, default=14)
+    parser.add_argument("--width", type=float, default=453.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    font_name, warning = load_font(args.font)
+    if warning:
+        print(warning)
+    paragraph = make_paragraph(args.words)
+    words = paragraph.split()
+
+    baseline, expected = best_of(args.repeat, lambda: simpleSplit(paragraph, font_name, args.size, args.width))
+
+    def cached_wrap(cache):
+        widths = cache.widths(words, font_name, args.size)
+        space = stringWidth(' ', font_name, args.size)
+        return [' '.join(words[a:b]) for a, b in break_lines(widths, space, args.width)]
+
+    cold, _ = best_of(args.repeat, lambda: cached_wrap(WordWidthCache()))
+    warm_cache = WordWidthCache()
+    warm, lines = best_of(args.repeat, lambda: cached_wrap(warm_cache))
+
+    assert lines == expected, "line breaker output differs from simpleSplit"
+    print(f"{args.words} words, {len(lines)} lines, font {font_name} {args.size}pt")
+    print(f"simpleSplit          {baseline * 1000:9.1f} ms")
+    print(f"cached widths (cold) {cold * 1000:9.1f} ms  x{baseline / cold:.1f}")
+    print(f"cached widths (warm) {warm * 1000:9.1f} ms  x{baseline / warm:.1f}")
+
+
+if __name__ == "__main__":
+    main()
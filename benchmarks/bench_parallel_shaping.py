@@ -0,0 +1,61 @@
+"""Measure how parallel shaping scales from 1 to N worker processes.
+
+    python benchmarks/bench_parallel_shaping.py [--size 5MB] [--shape long_paragraphs] [--max-workers 8]
+
+Wraps one generated corpus in-process, then through a fresh ShapingPool
+for each worker count, checks that the lines are identical and prints
+the wall time and speedup. Pools are started and the font is loaded in
+every worker before timing, so only the shaping work is measured.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_render import default_font
+from benchmarks.corpora import SHAPES, format_size, make_corpus, parse_size
+from pdfbuilder import PDFSettings, load_font
+from pdfbuilder.layout import page_geometry, wrap_text
+from pdfbuilder.parallel import ShapingPool, plan_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="5MB")
+    parser.add_argument("--shape", default="long_paragraphs", choices=SHAPES)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--font", help="TTF font (default: the app's Arabic font, else Vera)")
+    args = parser.parse_args()
+
+    font_path = args.font or default_font()
+    font_name, _ = load_font(font_path)
+    settings = PDFSettings(font_path=font_path)
+    width = page_geometry(settings).text_width
+    text = make_corpus(args.shape, parse_size(args.size))
+    print(f"{args.shape} {format_size(parse_size(args.size))}, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = wrap_text(text, font_name, settings.font_size, width)
+    serial = time.perf_counter() - start
+    print(f"in-process       {serial:8.2f} s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = ShapingPool(workers)
+        try:
+            pool.start(font_path)
+            start = time.perf_counter()
+            lines = pool.wrap_text(text, font_path, settings.font_size, width)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        assert lines == expected, "parallel shaping output differs from wrap_text"
+        chunks = len(plan_chunks(text.split("\n"), workers))
+        print(f"{workers:2d} worker(s)     {elapsed:8.2f} s  x{serial / elapsed:.2f}  ({chunks} chunks)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
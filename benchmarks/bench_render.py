@@ -0,0 +1,147 @@
+"""Time every render stage on generated Arabic corpora, per corpus shape, size and alignment.
+
+    python benchmarks/bench_render.py                       # 1KB..1MB, all shapes and alignments
+    python benchmarks/bench_render.py --full                # adds 5MB, 10MB and 50MB
+    python benchmarks/bench_render.py --sizes 64KB --shapes mixed --aligns Justify
+    python benchmarks/compare.py before.json after.json
+
+Each case renders the whole document through write_pdf and records wall
+and CPU seconds for script, reshape, bidi, wrap, paginate, draw and save
+plus the end-to-end total. Caches are cleared before every run unless --warm is
+given. Results are written as JSON (default benchmarks/results/<commit>.json)
+so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy
+import reportlab
+
+from benchmarks.corpora import SHAPES, format_size, make_corpus, parse_size
+from pdfbuilder import ALIGNMENTS, NOTO_NASKH_ARABIC, Document, FontAssetStore, PDFSettings, load_font, write_pdf
+from pdfbuilder.linebreak import default_word_widths
+from pdfbuilder.pagecache import default_page_cache
+from pdfbuilder.shaping import default_shaping_cache
+
+DEFAULT_SIZES = "1KB,16KB,256KB,1MB"
+FULL_SIZES = "1KB,16KB,256KB,1MB,5MB,10MB,50MB"
+# "shape" is reshape + wrap + bidi when a large body is shaped across processes
+STAGES = ("script", "reshape", "bidi", "wrap", "shape", "paginate", "draw", "save")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def default_font():
+    """The app's Arabic font when available, else reportlab's bundled Vera (same code paths)"""
+    return FontAssetStore().fetch(NOTO_NASKH_ARABIC) or os.path.join(
+        os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def summarize(samples):
+    return {"min": min(samples), "median": statistics.median(samples)}
+
+
+def run_case(document, settings, repeat, warm):
+    """Render document repeat times; returns the per-stage and total timings"""
+    wall = {stage: [] for stage in STAGES}
+    cpu = {stage: [] for stage in STAGES}
+    totals = []
+    report = None
+    for _ in range(repeat):
+        if not warm:
+            default_shaping_cache.clear()
+            default_word_widths.clear()
+            default_page_cache.clear()
+        start = time.perf_counter()
+        with open(os.devnull, "wb") as sink:
+            report = write_pdf(document, settings, sink)
+        totals.append(time.perf_counter() - start)
+        for stage in STAGES:
+            wall[stage].append(report.timings.get(stage, 0.0))
+            cpu[stage].append(report.cpu_timings.get(stage, 0.0))
+    return {
+        "page_count": report.page_count,
+        "line_count": report.line_count,
+        "byte_count": report.byte_count,
+        "total": summarize(totals),
+        "wall": {stage: summarize(samples) for stage, samples in wall.items()},
+        "cpu": {stage: summarize(samples) for stage, samples in cpu.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", help=f"Comma-separated corpus sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--full", action="store_true", help=f"Use {FULL_SIZES}")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="Comma-separated corpus shapes")
+    parser.add_argument("--aligns", default=",".join(ALIGNMENTS), help="Comma-separated alignment modes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warm", action="store_true", help="Keep shaping, width and page caches between runs")
+    parser.add_argument("--font", help="TTF font (default: the app's Arabic font, else Vera)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON results file (default benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in (args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)).split(",")]
+    shapes = args.shapes.split(",")
+    aligns = args.aligns.split(",")
+    font_path = args.font or default_font()
+    font_name, warning = load_font(font_path)
+    if warning:
+        print(f"warning: {warning}", file=sys.stderr)
+
+    commit = git_commit()
+    results = []
+    print(f"{'shape':<16} {'size':>6} {'align':<15} {'pages':>6} {'total ms':>10}  "
+          + " ".join(f"{stage:>9}" for stage in STAGES))
+    for shape in shapes:
+        for size in sizes:
+            document = Document(body=make_corpus(shape, size, args.seed), title="عنوان المستند")
+            for align in aligns:
+                settings = PDFSettings(text_align=align, font_path=font_path)
+                case = run_case(document, settings, args.repeat, args.warm)
+                results.append({"shape": shape, "size_bytes": size, "size": format_size(size), "align": align,
+                                **case})
+                print(f"{shape:<16} {format_size(size):>6} {align:<15} {case['page_count']:>6} "
+                      f"{case['total']['median'] * 1000:>10.1f}  "
+                      + " ".join(f"{case['wall'][stage]['median'] * 1000:>9.1f}" for stage in STAGES))
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "time": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "reportlab": reportlab.Version,
+                "numpy": numpy.__version__,
+                "font": font_name,
+                "repeat": args.repeat,
+                "warm": args.warm,
+                "seed": args.seed,
+            },
+            "results": results,
+        }, f, ensure_ascii=False, indent=1)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
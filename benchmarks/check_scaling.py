@@ -0,0 +1,125 @@
+"""Fail when a render stage grows faster than linearly with the input size.
+
+    python benchmarks/check_scaling.py                      # exit status 1 on super-linear growth
+    python benchmarks/check_scaling.py --start 64KB --steps 6 --tolerance 0.2
+
+For each alignment mode and corpus shape, renders inputs at doubling
+sizes and fits the log-log slope of each stage's wall time and of the
+render's peak memory (tracemalloc) against the input size. A slope of 1
+is linear, 2 quadratic; any slope above 1 + tolerance is reported and
+makes the script exit non-zero. Stages too short to time reliably at the
+largest size are skipped. tests/test_scaling.py runs a small, fast
+version of the same check with the test suite.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+from benchmarks.bench_render import STAGES, default_font
+from benchmarks.corpora import format_size, make_corpus, parse_size
+from pdfbuilder import ALIGNMENTS, Document, PDFSettings, load_font, write_pdf
+from pdfbuilder.linebreak import default_word_widths
+from pdfbuilder.pagecache import default_page_cache
+from pdfbuilder.shaping import default_shaping_cache
+
+DEFAULT_SHAPES = "single_paragraph,long_paragraphs,short_lines"
+
+
+def render_once(document, settings):
+    """Cold render to /dev/null; returns its RenderReport and total wall seconds"""
+    default_shaping_cache.clear()
+    default_word_widths.clear()
+    default_page_cache.clear()
+    start = time.perf_counter()
+    with open(os.devnull, "wb") as sink:
+        report = write_pdf(document, settings, sink)
+    return report, time.perf_counter() - start
+
+
+def peak_memory(document, settings):
+    """Peak traced allocation of one cold render, in bytes"""
+    default_shaping_cache.clear()
+    default_word_widths.clear()
+    default_page_cache.clear()
+    tracemalloc.start()
+    try:
+        with open(os.devnull, "wb") as sink:
+            write_pdf(document, settings, sink)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def growth_exponent(sizes, values):
+    """Slope of log(value) against log(size): 1.0 is linear growth"""
+    return float(numpy.polyfit(numpy.log(sizes), numpy.log(numpy.maximum(values, 1e-9)), 1)[0])
+
+
+def measure(shape, align, sizes, font_path, repeat, seed):
+    """Per-size minimum stage times, totals and peak memory for one shape and alignment"""
+    settings = PDFSettings(text_align=align, font_path=font_path)
+    series = {stage: [] for stage in STAGES + ("total", "peak_memory")}
+    for size in sizes:
+        document = Document(body=make_corpus(shape, size, seed))
+        runs = [render_once(document, settings) for _ in range(repeat)]
+        for stage in STAGES:
+            series[stage].append(min(report.timings.get(stage, 0.0) for report, _ in runs))
+        series["total"].append(min(seconds for _, seconds in runs))
+        series["peak_memory"].append(peak_memory(document, settings))
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", default="32KB", help="Smallest input size")
+    parser.add_argument("--steps", type=int, default=5, help="Number of doublings")
+    parser.add_argument("--shapes", default=DEFAULT_SHAPES, help="Comma-separated corpus shapes")
+    parser.add_argument("--aligns", default=",".join(ALIGNMENTS), help="Comma-separated alignment modes")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slope above 1.0")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="Skip stages faster than this at the largest size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--font", help="TTF font (default: the app's Arabic font, else Vera)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = parse_size(args.start)
+    sizes = [start * 2 ** i for i in range(args.steps)]
+    font_path = args.font or default_font()
+    _, warning = load_font(font_path)
+    if warning:
+        print(f"warning: {warning}", file=sys.stderr)
+
+    print(f"sizes: {', '.join(format_size(size) for size in sizes)}; limit: slope <= {1 + args.tolerance:.2f}")
+    failures = []
+    for shape in args.shapes.split(","):
+        for align in args.aligns.split(","):
+            series = measure(shape, align, sizes, font_path, args.repeat, args.seed)
+            slopes = []
+            for name, values in series.items():
+                if name != "peak_memory" and values[-1] < args.min_seconds:
+                    continue
+                slope = growth_exponent(sizes, values)
+                slopes.append(f"{name} {slope:.2f}")
+                if slope > 1 + args.tolerance and not math.isnan(slope):
+                    failures.append((shape, align, name, slope))
+            print(f"{shape:<16} {align:<15} " + ", ".join(slopes))
+
+    if failures:
+        print("\nSuper-linear growth:")
+        for shape, align, name, slope in failures:
+            print(f"  {shape} / {align} / {name}: slope {slope:.2f}")
+        return 1
+    print("\nAll stages scale linearly within tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Compare two bench_render.py result files case by case.
+
+    python benchmarks/compare.py benchmarks/results/abc1234.json benchmarks/results/def5678.json
+    python benchmarks/compare.py old.json new.json --stage draw --threshold 1.10
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["meta"], {(r["shape"], r["size_bytes"], r["align"]): r for r in data["results"]}
+
+
+def seconds(result, stage):
+    return result["total"]["median"] if stage == "total" else result["wall"][stage]["median"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--stage", default="total", help="total, or one of the render stages")
+    parser.add_argument("--threshold", type=float, default=1.10, help="Flag cases slower by this ratio")
+    args = parser.parse_args()
+
+    before_meta, before = load(args.before)
+    after_meta, after = load(args.after)
+    print(f"{args.stage}: {before_meta['commit']} -> {after_meta['commit']}")
+    slower = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = seconds(before[key], args.stage), seconds(after[key], args.stage)
+        ratio = new / old if old else float("inf")
+        flag = "  SLOWER" if ratio > args.threshold else ""
+        slower += bool(flag)
+        shape, _, align = key
+        print(f"{shape:<16} {before[key]['size']:>6} {align:<15} {old * 1000:>10.1f} -> {new * 1000:>10.1f} ms "
+              f"x{ratio:.2f}{flag}")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
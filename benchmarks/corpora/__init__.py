@@ -0,0 +1,105 @@
+"""Deterministic Arabic corpora for the benchmarks.
+
+Every shape is generated from a fixed seed up to a target size in UTF-8
+bytes, so the same arguments give the same text on every machine and
+commit:
+
+- long_paragraphs: a few hundred to a few thousand words per paragraph
+- single_paragraph: the whole text as one paragraph, no line breaks
+- short_lines: many one- to six-word lines, like poetry or lists
+- mixed: Arabic with Latin words, digits and punctuation in most paragraphs
+- diacritics: fully vowelled text (harakat on most letters)
+- bilingual: Arabic paragraphs interleaved with whole English and numeric ones
+- bundled: the checked-in sample document repeated to size
+"""
+import os
+import random
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arabic_sample.txt")
+
+WORDS = ("السلام عليكم ورحمة الله وبركاته هذا نص تجريبي لقياس سرعة بناء المستندات العربية الطويلة "
+         "في الصفحات مع التفاف الأسطر وإعادة تشكيل الحروف وترتيبها من اليمين إلى اليسار").split()
+LATIN = "PDF Streamlit reportlab Unicode version 2.0 (beta) example.com ID-4711 A4 UTF-8".split()
+ENGLISH = ("the quick brown fox jumps over a lazy dog while the document is built page by page "
+           "with wrapped lines and right aligned text").split()
+HARAKAT = "ًٌٍَُِّْ"
+
+SHAPES = ("long_paragraphs", "single_paragraph", "short_lines", "mixed", "diacritics", "bilingual", "bundled")
+
+
+def _vowel(word, rng):
+    return "".join(ch + rng.choice(HARAKAT) if rng.random() < 0.8 else ch for ch in word)
+
+
+def _paragraph(shape, rng):
+    if shape == "single_paragraph":
+        return " ".join(rng.choice(WORDS) for _ in range(1000))
+    if shape == "long_paragraphs":
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(300, 3000)))
+    if shape == "short_lines":
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+    if shape == "mixed":
+        words = [rng.choice(WORDS) for _ in range(rng.randint(10, 80))]
+        for _ in range(rng.randint(0, 6)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(LATIN + [str(rng.randint(1, 99999))]))
+        return " ".join(words)
+    if shape == "diacritics":
+        return " ".join(_vowel(rng.choice(WORDS), rng) for _ in range(rng.randint(10, 80)))
+    if shape == "bilingual":
+        kind = rng.random()
+        if kind < 0.4:
+            return " ".join(rng.choice(ENGLISH) for _ in range(rng.randint(10, 80))).capitalize() + "."
+        if kind < 0.5:
+            return " ".join(f"{rng.randint(1, 99999):,}" for _ in range(rng.randint(3, 12)))
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 80)))
+    raise ValueError(f"unknown corpus shape: {shape}")
+
+
+def _truncate(text, size_bytes):
+    """Cut text at the last space or line break that keeps it within size_bytes"""
+    data = text.encode("utf-8")
+    if len(data) <= size_bytes:
+        return text
+    head = data[:size_bytes].decode("utf-8", errors="ignore")
+    cut = max(head.rfind(" "), head.rfind("\n"))
+    return head[:cut] if cut > 0 else head
+
+
+def make_corpus(shape, size_bytes, seed=0):
+    """Return text of the given shape, size_bytes long in UTF-8 (up to the last word that fits)"""
+    if shape == "bundled":
+        with open(SAMPLE_PATH, encoding="utf-8") as f:
+            sample = f.read().strip()
+        copies = -(-size_bytes // len(sample.encode("utf-8")))
+        return _truncate("\n\n".join([sample] * max(1, copies)), size_bytes)
+
+    rng = random.Random(f"{shape}-{seed}")
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        paragraph = _paragraph(shape, rng)
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8")) + 1
+        # Blank line between groups of paragraphs, as in real documents
+        if shape not in ("short_lines", "single_paragraph") and rng.random() < 0.2:
+            paragraphs.append("")
+            total += 1
+    separator = " " if shape == "single_paragraph" else "\n"
+    return _truncate(separator.join(paragraphs), size_bytes)
+
+
+def parse_size(text):
+    """'1KB', '16kb', '2.5MB' or a plain byte count -> bytes"""
+    text = text.strip().upper()
+    for suffix, factor in (("KB", 1024), ("MB", 1024 * 1024), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def format_size(size_bytes):
+    if size_bytes >= 1024 * 1024:
+        return f"{size_bytes / (1024 * 1024):g}MB"
+    if size_bytes >= 1024:
+        return f"{size_bytes / 1024:g}KB"
+    return f"{size_bytes}B"
@@ -0,0 +1,87 @@
+"""Headless Arabic PDF rendering engine used by the Streamlit app"""
+from .artifacts import ArtifactCache, render_key
+from .assets import NOTO_NASKH_ARABIC, FontAsset, FontAssetError, FontAssetStore
+from .borders import BORDER_STYLES, draw_border, draw_decorative_border, register_border_style
+from .fonts import FALLBACK_FONT, FontInfo, FontRegistry, default_registry, load_font
+from .incremental import LayoutSession
+from .jobs import BackgroundRenderer, RenderJob, estimate_render_bytes
+from .layout import Layout, PageGeometry, layout_document
+from .metrics import RenderMetrics, default_metrics, start_metrics_exporter, start_metrics_server
+from .model import (
+    ALIGN_CENTER,
+    ALIGN_JUSTIFY,
+    ALIGN_RIGHT,
+    ALIGNMENTS,
+    Document,
+    PDFSettings,
+    mm_to_points,
+)
+from .pagecache import PageContentCache, default_page_cache
+from .pagination import PagePlan, PageSlice, paginate
+from .parallel import warm_worker
+from .render import (
+    RenderCancelled,
+    RenderProgress,
+    RenderReport,
+    build_pdf,
+    draw_page,
+    render_layout,
+    write_pdf,
+)
+from .shaping import ShapingCache, default_shaping_cache
+from .singleflight import SingleFlight
+from .timing import StageTimer, configure_render_log
+
+__all__ = [
+    "ALIGNMENTS",
+    "ArtifactCache",
+    "BORDER_STYLES",
+    "BackgroundRenderer",
+    "ALIGN_CENTER",
+    "ALIGN_JUSTIFY",
+    "ALIGN_RIGHT",
+    "Document",
+    "FALLBACK_FONT",
+    "FontAsset",
+    "FontAssetError",
+    "FontAssetStore",
+    "FontInfo",
+    "FontRegistry",
+    "Layout",
+    "LayoutSession",
+    "NOTO_NASKH_ARABIC",
+    "PageContentCache",
+    "PDFSettings",
+    "PageGeometry",
+    "PagePlan",
+    "PageSlice",
+    "RenderCancelled",
+    "RenderJob",
+    "RenderMetrics",
+    "RenderProgress",
+    "RenderReport",
+    "ShapingCache",
+    "SingleFlight",
+    "StageTimer",
+    "build_pdf",
+    "configure_render_log",
+    "default_metrics",
+    "default_page_cache",
+    "default_registry",
+    "default_shaping_cache",
+    "draw_border",
+    "draw_decorative_border",
+    "draw_page",
+    "estimate_render_bytes",
+    "layout_document",
+    "load_font",
+    "mm_to_points",
+    "paginate",
+    "register_border_style",
+    "render_key",
+    "render_layout",
+    "start_metrics_exporter",
+    "start_metrics_server",
+    "warm_worker",
+    "write_pdf",
+]
@@ -0,0 +1,228 @@
+"""Content-addressed on-disk cache of rendered PDFs"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+
+from .fileutil import atomic_writer
+from .fonts import default_registry
+from .render import RenderCancelled, RenderProgress, RenderReport, write_pdf
+from .singleflight import SingleFlight
+
+PDF_CACHE_ENV = "PDFBUILDER_PDF_CACHE"
+
+# Bump whenever a code change alters the PDF produced for the same inputs
+RENDER_VERSION = 3
+
+
+def render_key(document, settings):
+    """Hash of everything that affects the rendered PDF.
+
+    The font is identified by its content digest rather than its path, so
+    the same font in a different cache directory still hits.
+    """
+    settings_fields = asdict(settings)
+    font_path = settings_fields.pop("font_path")
+    font_digest = None
+    if font_path and os.path.exists(font_path):
+        font_digest = default_registry.digest(os.path.realpath(font_path))
+
+    payload = {
+        "version": RENDER_VERSION,
+        "document": asdict(document),
+        "settings": settings_fields,
+        "font": font_digest,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def default_pdf_cache_dir():
+    """PDF cache directory: $PDFBUILDER_PDF_CACHE or the user cache dir"""
+    if os.environ.get(PDF_CACHE_ENV):
+        return os.environ[PDF_CACHE_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdfbuilder", "pdf")
+
+
+class ArtifactCache:
+    """Rendered PDFs stored under the hash of their inputs.
+
+    Entries expire ttl_seconds after they were written; when the cache
+    grows past max_bytes the least recently read entries are removed.
+    The cache is shared by every session and process using the directory.
+    Identical renders that overlap in time within the process run once.
+
+    Writes add to a running byte total instead of rescanning the directory;
+    the full scan that expires and evicts entries runs when that total
+    passes max_bytes, or at most every scan_interval seconds or scan_writes
+    writes to pick up what other processes wrote and removed.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024, ttl_seconds=24 * 3600, scan_interval=60.0,
+                 scan_writes=64):
+        self.directory = directory or default_pdf_cache_dir()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.scan_interval = scan_interval
+        self.scan_writes = scan_writes
+        self._lock = threading.Lock()
+        self._bytes = None  # PDF bytes on disk as of the last scan plus our writes since; None before the first
+        self._last_scan = 0.0
+        self._writes_since_scan = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flights = SingleFlight()
+
+    def _paths(self, key):
+        """PDF and metadata paths for a key, fanned out over subdirectories"""
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".pdf", base + ".json"
+
+    def _lookup(self, key):
+        """Return (pdf_path, RenderReport) for a fresh entry, or None, without counting"""
+        pdf_path, meta_path = self._paths(key)
+        try:
+            written = os.stat(pdf_path).st_mtime
+            with open(meta_path) as f:
+                report = RenderReport(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        now = time.time()
+        if now - written > self.ttl_seconds:
+            self._remove(key)
+            return None
+
+        # Record the read in atime for LRU eviction; mtime keeps the write time for the TTL
+        os.utime(pdf_path, (now, written))
+        return pdf_path, report
+
+    def get(self, key):
+        """Return (pdf_path, RenderReport) for a fresh entry, or None"""
+        cached = self._lookup(key)
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def render(self, document, settings, progress=None, layout_session=None):
+        """Return (pdf_path, RenderReport, hit), rendering into the cache on a miss.
+
+        A miss that matches a render already running in this process waits
+        for that render and shares its file instead of starting another.
+        layout_session is passed on to write_pdf when this call renders.
+        """
+        key = render_key(document, settings)
+        cached = self.get(key)
+        if cached:
+            return cached + (True,)
+
+        progress = progress or RenderProgress()
+        while True:
+            try:
+                (pdf_path, report), _ = self.flights.do(
+                    key, lambda: self._render_miss(key, document, settings, progress, layout_session),
+                    poll=progress.check)
+                return pdf_path, report, False
+            except RenderCancelled:
+                # The render we waited on was cancelled by its own caller; run ours instead
+                if progress.cancelled:
+                    raise
+
+    def _render_miss(self, key, document, settings, progress, layout_session=None):
+        # An identical render may have finished between our lookup and now
+        cached = self._lookup(key)
+        if cached:
+            return cached
+        pdf_path, meta_path = self._paths(key)
+        report = write_pdf(document, settings, pdf_path, progress, layout_session)
+        with atomic_writer(meta_path, 'w') as f:
+            json.dump(asdict(report), f)
+        self._written(key, report.byte_count)
+        return pdf_path, report
+
+    def _written(self, key, size):
+        """Count a new entry of size bytes and evict if a scan is due"""
+        now = time.monotonic()
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size
+            self._writes_since_scan += 1
+            due = (self._bytes is None or self._bytes > self.max_bytes
+                   or self._writes_since_scan >= self.scan_writes or now - self._last_scan >= self.scan_interval)
+            if due:
+                # Claim the scan so concurrent writers don't start their own
+                self._writes_since_scan = 0
+                self._last_scan = now
+        if due:
+            self.evict(keep=key)
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep=None):
+        """Drop expired entries, then least recently read ones until under max_bytes.
+
+        keep names an entry that must survive, e.g. one about to be served.
+        Walks the whole directory; renders call it through _written() only
+        when a scan is due.
+        """
+        started = time.monotonic()
+        now = time.time()
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pdf"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                key = name[:-len(".pdf")]
+                if now - st.st_mtime > self.ttl_seconds:
+                    self._remove(key)
+                    with self._lock:
+                        self.evictions += 1
+                    continue
+                entries.append((st.st_atime, st.st_size, key))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._bytes = total
+            self._last_scan = started
+            self._writes_since_scan = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters, the hit rate and coalesced renders"""
+        lookups = self.hits + self.misses
+        flights = self.flights.stats()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "renders": flights["leaders"],
+            "coalesced": flights["coalesced"],
+        }
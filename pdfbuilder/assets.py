@@ -0,0 +1,235 @@
+"""Content-addressed font asset store with offline mirrors"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from .fileutil import atomic_writer
+from .fonts import file_sha256
+
+FONT_CACHE_ENV = "PDFBUILDER_FONT_CACHE"
+FONT_MIRROR_ENV = "PDFBUILDER_FONT_MIRROR"
+FONT_OFFLINE_ENV = "PDFBUILDER_FONT_OFFLINE"
+
+# Optional local mirror next to the package: no font is checked in, but a deployment that
+# copies the TTF here (or bakes it into an image) starts without the network
+LOCAL_FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+# First bytes of TrueType / OpenType files
+FONT_MAGIC = (b'\x00\x01\x00\x00', b'true', b'OTTO', b'ttcf')
+
+
+@dataclass(frozen=True)
+class FontAsset:
+    """A font file and where to get it.
+
+    ``sha256`` pins the expected content; without it a file is accepted if
+    it looks like a complete TrueType font and its digest is recorded.
+    """
+    filename: str
+    url: str
+    sha256: Optional[str] = None
+
+
+NOTO_NASKH_ARABIC = FontAsset(
+    filename="NotoNaskhArabic-Regular.ttf",
+    url="https://github.com/google/fonts/raw/main/ofl/notonaskharabic/NotoNaskhArabic%5Bwght%5D.ttf",
+    sha256=os.environ.get("PDFBUILDER_ARABIC_FONT_SHA256") or None,
+)
+
+
+class FontAssetError(Exception):
+    """A font file failed verification"""
+
+
+def default_cache_dir():
+    """Font cache directory: $PDFBUILDER_FONT_CACHE or the user cache dir"""
+    if os.environ.get(FONT_CACHE_ENV):
+        return os.environ[FONT_CACHE_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdfbuilder", "fonts")
+
+
+def default_mirrors():
+    """Local directories searched before the network, the package's fonts/ directory first"""
+    mirrors = [LOCAL_FONT_DIR]
+    extra = os.environ.get(FONT_MIRROR_ENV, "")
+    mirrors.extend(path for path in extra.split(os.pathsep) if path)
+    return mirrors
+
+
+def _check_font(head, digest, asset):
+    """Raise FontAssetError unless the bytes look like the expected font"""
+    if head[:4] not in FONT_MAGIC:
+        raise FontAssetError(f"{asset.filename} is not a TrueType/OpenType font")
+    if asset.sha256 and digest != asset.sha256.lower():
+        raise FontAssetError(f"{asset.filename} SHA-256 mismatch: got {digest}, expected {asset.sha256}")
+
+
+class FontAssetStore:
+    """Font files stored by SHA-256 under a cache directory.
+
+    Each asset resolves in order: the verified cache entry, a local mirror
+    directory, then (unless offline) a download. Blobs live at
+    ``<cache_dir>/<sha256>.ttf``; ``<cache_dir>/<filename>.sha256`` points an
+    asset name at its blob. All writes go through a temp file and rename.
+
+    ``timeout`` bounds each network read and ``download_timeout`` the whole
+    download. Downloads run outside the store lock, so cache hits and other
+    assets never wait on the network; callers fetching the same asset wait
+    for one download instead of starting their own.
+    """
+
+    def __init__(self, cache_dir=None, mirrors=None, timeout=15.0, offline=None, download_timeout=120.0):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.mirrors = default_mirrors() if mirrors is None else list(mirrors)
+        self.timeout = timeout
+        self.download_timeout = download_timeout
+        if offline is None:
+            offline = os.environ.get(FONT_OFFLINE_ENV, "") not in ("", "0")
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._downloads = {}  # asset filename -> lock held while it downloads
+        self._verified = set()  # blob paths already hashed by this process
+        self.hits = 0
+        self.misses = 0
+        self.sources = {"cache": 0, "mirror": 0, "download": 0}
+        self.last_fetch_seconds = 0.0
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.ttf")
+
+    def _pointer_path(self, asset):
+        return os.path.join(self.cache_dir, f"{asset.filename}.sha256")
+
+    def _cached(self, asset):
+        """Return the verified cached blob for asset, or None"""
+        try:
+            with open(self._pointer_path(asset)) as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if asset.sha256 and digest != asset.sha256.lower():
+            return None
+        path = self._blob_path(digest)
+        if path in self._verified:
+            return path if os.path.exists(path) else None
+        if not os.path.exists(path) or file_sha256(path) != digest:
+            return None
+        self._verified.add(path)
+        return path
+
+    def _store(self, asset, digest, source, move=False):
+        """Save a verified file as the blob for digest and point asset at it"""
+        path = self._blob_path(digest)
+        if os.path.exists(path) and (path in self._verified or file_sha256(path) == digest):
+            if move:
+                os.unlink(source)
+        elif move:
+            os.replace(source, path)
+        else:
+            with atomic_writer(path) as out, open(source, 'rb') as f:
+                shutil.copyfileobj(f, out)
+        with atomic_writer(self._pointer_path(asset), 'w') as f:
+            f.write(digest)
+        self._verified.add(path)
+        return path
+
+    def _from_mirror(self, asset):
+        """Copy asset from the first mirror holding a valid copy"""
+        for mirror in self.mirrors:
+            candidate = os.path.join(mirror, asset.filename)
+            if not os.path.isfile(candidate):
+                continue
+            with open(candidate, 'rb') as f:
+                head = f.read(4)
+            digest = file_sha256(candidate)
+            try:
+                _check_font(head, digest, asset)
+            except FontAssetError:
+                continue
+            return self._store(asset, digest, candidate)
+        return None
+
+    def _download(self, asset):
+        """Download asset into the cache, verifying size, format and digest"""
+        response = requests.get(asset.url, timeout=self.timeout, stream=True)
+        response.raise_for_status()
+        # Content-Length is only the file size when the body is not compressed
+        expected_size = None
+        if not response.headers.get("Content-Encoding"):
+            expected_size = response.headers.get("Content-Length")
+
+        # Stream into a staging file, hashing as we go; it is only renamed
+        # into place once the size, format and digest check out
+        staged = os.path.join(self.cache_dir, f"{asset.filename}.download")
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        deadline = time.monotonic() + self.download_timeout
+        with atomic_writer(staged) as f:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                # The read timeout alone lets a server trickle bytes forever
+                if time.monotonic() > deadline:
+                    raise FontAssetError(f"{asset.filename} download took over {self.download_timeout:g} s")
+                if len(head) < 4:
+                    head += chunk[:4 - len(head)]
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+            if expected_size is not None and size != int(expected_size):
+                raise FontAssetError(f"{asset.filename} download truncated: {size} of {expected_size} bytes")
+            _check_font(head, digest.hexdigest(), asset)
+        with self._lock:
+            return self._store(asset, digest.hexdigest(), staged, move=True)
+
+    def fetch(self, asset=NOTO_NASKH_ARABIC):
+        """Return a local path to a verified copy of asset, or None if unavailable"""
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                path = self._cached(asset)
+                if path:
+                    self.hits += 1
+                    self.sources["cache"] += 1
+                    return path
+
+                self.misses += 1
+                path = self._from_mirror(asset)
+                if path:
+                    self.sources["mirror"] += 1
+                    return path
+
+                if self.offline:
+                    return None
+                download_lock = self._downloads.setdefault(asset.filename, threading.Lock())
+
+            with download_lock:
+                # Another caller may have downloaded it while we waited
+                with self._lock:
+                    path = self._cached(asset)
+                if path:
+                    return path
+                try:
+                    path = self._download(asset)
+                except (requests.RequestException, FontAssetError, OSError):
+                    return None
+                with self._lock:
+                    self.sources["download"] += 1
+                return path
+        finally:
+            self.last_fetch_seconds = time.perf_counter() - start
+
+    def stats(self):
+        """Return hit/miss counters, where misses were served from and the last lookup time"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sources": dict(self.sources),
+            "last_fetch_seconds": self.last_fetch_seconds,
+        }
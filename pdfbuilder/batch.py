@@ -0,0 +1,147 @@
+"""JSONL batch jobs: one document spec per line in, one result per line out.
+
+A job line looks like::
+
+    {"id": "letter-0001", "title": "...", "body": "...", "font_size": 14,
+     "line_spacing": 1.5, "margins": {"top": 35, "bottom": 35, "left": 25, "right": 25},
+     "text_align": "Justify"}
+
+Every field except body is optional and falls back to the batch defaults;
+margins may also be given as margin_top/margin_bottom/... fields.
+"""
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import replace
+
+from .model import ALIGN_CENTER, ALIGN_JUSTIFY, ALIGN_RIGHT, Document
+from .parallel import warm_worker
+from .render import write_pdf
+
+SETTINGS_FIELDS = ("title_font_size", "font_size", "line_spacing", "text_align",
+                   "margin_top", "margin_bottom", "margin_left", "margin_right")
+ALIGN_ALIASES = {"right": ALIGN_RIGHT, "center": ALIGN_CENTER, "justify": ALIGN_JUSTIFY}
+
+
+def iter_specs(lines):
+    """Yield (line_number, spec_or_error) for each non-blank JSONL line, lazily"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            spec = json.loads(line)
+            if not isinstance(spec, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            yield line_number, e
+            continue
+        yield line_number, spec
+
+
+def job_from_spec(spec, defaults):
+    """Build (Document, PDFSettings) from a job spec on top of default settings.
+
+    Raises ValueError for a spec of the wrong shape, so callers can report
+    it as a bad job rather than fail while rendering.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("job must be a JSON object")
+    if not isinstance(spec.get("body"), str):
+        raise ValueError("body must be a string")
+    if not spec["body"].strip():
+        raise ValueError("body is empty")
+    if not isinstance(spec.get("title") or "", str):
+        raise ValueError("title must be a string")
+    margins = spec.get("margins") or {}
+    if not isinstance(margins, dict):
+        raise ValueError("margins must be an object of top/bottom/left/right")
+    overrides = {name: spec[name] for name in SETTINGS_FIELDS if name in spec}
+    for side, value in margins.items():
+        overrides[f"margin_{side}"] = value
+    if "text_align" in overrides:
+        overrides["text_align"] = ALIGN_ALIASES.get(overrides["text_align"], overrides["text_align"])
+    document = Document(body=spec["body"], title=spec.get("title") or "")
+    return document, replace(defaults, **overrides)
+
+
+def output_name(spec, line_number):
+    """File name for a job: its id when safe, else its line number"""
+    job_id = str(spec.get("id", ""))
+    if job_id and re.fullmatch(r"[\w.-]+", job_id) and job_id not in (".", ".."):
+        return f"{job_id}.pdf"
+    return f"line-{line_number:08d}.pdf"
+
+
+def render_job(job):
+    """Render one job; returns its result record"""
+    line_number, job_id, document, settings, output_path = job
+    start = time.perf_counter()
+    result = {"line": line_number, "id": job_id, "output": output_path}
+    try:
+        report = write_pdf(document, settings, output_path)
+        result.update(page_count=report.page_count, byte_count=report.byte_count, line_count=report.line_count,
+                      timings=report.timings, cpu_timings=report.cpu_timings, error=None)
+    except Exception as e:
+        result.update(page_count=0, byte_count=0, line_count=0, timings={}, cpu_timings={},
+                      error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(lines, output_dir, results, defaults, jobs=1, max_in_flight=None):
+    """Render the JSONL jobs in lines, writing one JSON result per line to results.
+
+    Specs are read, dispatched and written out as a stream with at most
+    max_in_flight jobs held at once, so memory does not grow with the job
+    file. Results are written in completion order. Returns (ok, failed).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    max_in_flight = max_in_flight or jobs * 4
+    counts = {"ok": 0, "failed": 0}
+
+    def emit(result):
+        counts["failed" if result["error"] else "ok"] += 1
+        results.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def reject(line_number, job_id, error):
+        emit({"line": line_number, "id": job_id, "output": None, "page_count": 0, "byte_count": 0,
+              "line_count": 0, "timings": {}, "cpu_timings": {}, "error": error, "seconds": 0.0})
+
+    # Output name -> line of the job writing it, so a repeated id cannot overwrite an earlier job's PDF
+    claimed = {}
+
+    def prepared():
+        for line_number, spec in iter_specs(lines):
+            if isinstance(spec, Exception):
+                reject(line_number, None, f"invalid job: {spec}")
+                continue
+            try:
+                document, settings = job_from_spec(spec, defaults)
+            except (TypeError, ValueError) as e:
+                reject(line_number, spec.get("id"), f"invalid job: {e!r}")
+                continue
+            name = output_name(spec, line_number)
+            if name in claimed:
+                reject(line_number, spec.get("id"), f"duplicate id: {name} is already written by line {claimed[name]}")
+                continue
+            claimed[name] = line_number
+            yield line_number, spec.get("id"), document, settings, os.path.join(output_dir, name)
+
+    if jobs <= 1:
+        for job in prepared():
+            emit(render_job(job))
+        return counts["ok"], counts["failed"]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=warm_worker, initargs=(defaults.font_path,)) as pool:
+        in_flight = set()
+        for job in prepared():
+            in_flight.add(pool.submit(render_job, job))
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emit(future.result())
+        for future in as_completed(in_flight):
+            emit(future.result())
+    return counts["ok"], counts["failed"]
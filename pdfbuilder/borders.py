@@ -0,0 +1,66 @@
+"""Page border styles, drawn once per document as reusable PDF forms"""
+
+
+def draw_decorative_border(c, width, height):
+    """Draw decorative corner borders on the page"""
+    c.setStrokeColorRGB(0.72, 0.53, 0.04)  # Golden color
+    c.setLineWidth(2)
+
+    # Top right corner decoration
+    corner_size = 60
+
+    # Top right ornamental corner
+    c.circle(width - 30, height - 30, 8, stroke=1, fill=0)
+    c.circle(width - 45, height - 20, 5, stroke=1, fill=0)
+    c.circle(width - 20, height - 45, 5, stroke=1, fill=0)
+    c.line(width - 30, height - 30, width - 30, height - corner_size)
+    c.line(width - 30, height - 30, width - corner_size, height - 30)
+
+    # Bottom left corner decoration
+    c.setStrokeColorRGB(0.0, 0.6, 0.8)  # Blue color
+    c.circle(30, 30, 8, stroke=1, fill=0)
+    c.circle(45, 40, 5, stroke=1, fill=0)
+    c.circle(40, 45, 5, stroke=1, fill=0)
+    c.line(30, 30, 30, corner_size + 30)
+    c.line(30, 30, corner_size + 30, 30)
+    c.circle(25, 50, 3, stroke=1, fill=0)
+    c.circle(50, 25, 3, stroke=1, fill=0)
+
+    # Horizontal line at bottom
+    c.line(corner_size + 40, 30, width - 30, 30)
+
+
+# Border style name -> function drawing it on a (canvas, width, height)
+BORDER_STYLES = {
+    "decorative": draw_decorative_border,
+}
+
+
+def register_border_style(name, draw):
+    """Add a border style; draw(c, width, height) paints one page's border"""
+    BORDER_STYLES[name] = draw
+
+
+def border_form_name(style, width, height):
+    """Name of the form holding a border style at one page size"""
+    return f"border-{style}-{width:g}x{height:g}"
+
+
+def draw_border(c, style, width, height):
+    """Paint a border style on the current page.
+
+    The style's drawing operators are compiled into a Form XObject the first
+    time a document uses it at this page size; every page then references
+    that form, so output size does not grow with the border's complexity.
+    """
+    try:
+        draw = BORDER_STYLES[style]
+    except KeyError:
+        raise ValueError(f"Unknown border style: {style!r}") from None
+
+    name = border_form_name(style, width, height)
+    if not c.hasForm(name):
+        c.beginForm(name, 0, 0, width, height)
+        draw(c, width, height)
+        c.endForm()
+    c.doForm(name)
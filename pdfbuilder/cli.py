@@ -0,0 +1,235 @@
+"""Command-line entry point for headless batch rendering.
+
+    python -m pdfbuilder render letters/ -o out/ --jobs 8
+    python -m pdfbuilder render "letters/*.txt" -o out/ --align justify
+    python -m pdfbuilder batch jobs.jsonl -o out/ --results results.jsonl --jobs 8
+    python -m pdfbuilder serve --port 8080 --workers 4
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .assets import NOTO_NASKH_ARABIC, FontAssetStore
+from .batch import run_batch
+from .fonts import load_font
+from .model import ALIGN_CENTER, ALIGN_JUSTIFY, ALIGN_RIGHT, Document, PDFSettings
+from .parallel import warm_worker
+from .render import write_pdf
+from .server import RenderServer
+from .timing import configure_render_log
+
+ALIGN_CHOICES = {"right": ALIGN_RIGHT, "center": ALIGN_CENTER, "justify": ALIGN_JUSTIFY}
+
+
+def add_settings_arguments(parser):
+    """Options matching the Streamlit sidebar; defaults are the same"""
+    defaults = PDFSettings()
+    parser.add_argument("--font", help="Arabic TTF font (default: fetched into the font cache)")
+    parser.add_argument("--title-font-size", type=int, default=defaults.title_font_size)
+    parser.add_argument("--font-size", type=int, default=defaults.font_size)
+    parser.add_argument("--line-spacing", type=float, default=defaults.line_spacing)
+    parser.add_argument("--margin-top", type=float, default=defaults.margin_top, help="mm")
+    parser.add_argument("--margin-bottom", type=float, default=defaults.margin_bottom, help="mm")
+    parser.add_argument("--margin-left", type=float, default=defaults.margin_left, help="mm")
+    parser.add_argument("--margin-right", type=float, default=defaults.margin_right, help="mm")
+    parser.add_argument("--align", choices=sorted(ALIGN_CHOICES), default="right")
+    parser.add_argument("--no-border", action="store_true", help="Leave out the decorative border")
+
+
+def settings_from_args(args, font_path):
+    return PDFSettings(
+        title_font_size=args.title_font_size,
+        font_size=args.font_size,
+        line_spacing=args.line_spacing,
+        margin_top=args.margin_top,
+        margin_bottom=args.margin_bottom,
+        margin_left=args.margin_left,
+        margin_right=args.margin_right,
+        text_align=ALIGN_CHOICES[args.align],
+        font_path=font_path,
+        border_style=None if args.no_border else PDFSettings.border_style,
+    )
+
+
+def resolve_font_path(args):
+    """Font given on the command line, else the cached Noto Naskh Arabic"""
+    if args.font:
+        return args.font
+    return FontAssetStore().fetch(NOTO_NASKH_ARABIC)
+
+
+def glob_root(pattern):
+    """Leading directories of a glob pattern, before its first wildcard"""
+    parts = pattern.split(os.sep)
+    root = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        root.append(part)
+    return os.sep.join(root)
+
+
+def collect_inputs(patterns):
+    """Expand directories (their *.txt files) and glob patterns.
+
+    Returns sorted, de-duplicated (path, relative) pairs, where relative is
+    the path below its directory or the pattern's non-wildcard root; the
+    output keeps that layout, so letter.txt in two subdirectories does not
+    become one PDF.
+    """
+    inputs = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            root, paths = pattern, glob.glob(os.path.join(pattern, "*.txt"))
+        else:
+            root, paths = glob_root(pattern), glob.glob(pattern, recursive=True)
+        for path in paths:
+            inputs.setdefault(path, os.path.relpath(path, root or os.curdir))
+    return sorted(inputs.items())
+
+
+def output_paths(inputs, output_dir):
+    """Map each (path, relative) input to its PDF path; raises ValueError if two map to one file"""
+    outputs = {}
+    for path, relative in inputs:
+        output = os.path.join(output_dir, os.path.splitext(relative)[0] + ".pdf")
+        if output in outputs:
+            raise ValueError(f"{outputs[output]} and {path} would both be written to {output}")
+        outputs[output] = path
+    return list(outputs)
+
+
+def render_file(job):
+    """Render one text file; returns (input, output, page_count, error)"""
+    input_path, output_path, settings, first_line_title = job
+    try:
+        with open(input_path, encoding="utf-8") as f:
+            text = f.read()
+        title = ""
+        if first_line_title:
+            title, _, text = text.partition("\n")
+        report = write_pdf(Document(body=text, title=title), settings, output_path)
+        return input_path, output_path, report.page_count, None
+    except Exception as e:
+        return input_path, output_path, 0, f"{type(e).__name__}: {e}"
+
+
+def run_render(args):
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No input files found", file=sys.stderr)
+        return 1
+    try:
+        outputs = output_paths(inputs, args.output)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    font_path = resolve_font_path(args)
+    _, warning = load_font(font_path)
+    if warning:
+        print(f"warning: {warning}", file=sys.stderr)
+    settings = settings_from_args(args, font_path)
+
+    for directory in {os.path.dirname(output) for output in outputs}:
+        os.makedirs(directory, exist_ok=True)
+    jobs = [(path, output, settings, args.title_from_first_line) for (path, _), output in zip(inputs, outputs)]
+
+    start = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=warm_worker, initargs=(font_path,)) as pool:
+            chunksize = max(1, min(64, len(jobs) // (args.jobs * 4)))
+            results = list(pool.map(render_file, jobs, chunksize=chunksize))
+    else:
+        results = [render_file(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    failures = [(path, error) for path, _, _, error in results if error]
+    for path, error in failures:
+        print(f"failed: {path}: {error}", file=sys.stderr)
+
+    documents = len(results) - len(failures)
+    pages = sum(page_count for _, _, page_count, _ in results)
+    print(f"Rendered {documents} documents ({pages} pages) in {elapsed:.2f}s "
+          f"with {args.jobs} job(s): {documents / elapsed:.1f} documents/s, {pages / elapsed:.1f} pages/s")
+    return 1 if failures else 0
+
+
+def run_batch_file(args):
+    font_path = resolve_font_path(args)
+    _, warning = load_font(font_path)
+    if warning:
+        print(f"warning: {warning}", file=sys.stderr)
+    defaults = settings_from_args(args, font_path)
+
+    os.makedirs(args.output, exist_ok=True)
+    results_path = args.results or os.path.join(args.output, "results.jsonl")
+    start = time.perf_counter()
+    with open(args.jobs_file, encoding="utf-8") as lines:
+        if results_path == "-":
+            ok, failed = run_batch(lines, args.output, sys.stdout, defaults, args.jobs, args.max_in_flight)
+        else:
+            with open(results_path, "w", encoding="utf-8") as results:
+                ok, failed = run_batch(lines, args.output, results, defaults, args.jobs, args.max_in_flight)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {ok} documents in {elapsed:.2f}s ({ok / elapsed:.1f} documents/s), {failed} failed",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_server(args):
+    font_path = resolve_font_path(args)
+    _, warning = load_font(font_path)
+    if warning:
+        print(f"warning: {warning}", file=sys.stderr)
+    server = RenderServer(settings_from_args(args, font_path), workers=args.workers, queue_size=args.queue_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdfbuilder", description="Render Arabic PDFs without Streamlit")
+    parser.add_argument("--render-log", help="Append one JSON record per render to this file ('-' for stderr; "
+                                             "default: $PDFBUILDER_RENDER_LOG)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="Render a directory or glob of UTF-8 text files")
+    render.add_argument("inputs", nargs="+", help="Directories (all *.txt inside) or glob patterns")
+    render.add_argument("-o", "--output", required=True, help="Output directory for the PDFs")
+    render.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    render.add_argument("--title-from-first-line", action="store_true",
+                        help="Use each file's first line as the title")
+    add_settings_arguments(render)
+    render.set_defaults(handler=run_render)
+
+    batch = commands.add_parser("batch", help="Render the document specs in a JSONL job file")
+    batch.add_argument("jobs_file", help="JSONL file, one document spec per line")
+    batch.add_argument("-o", "--output", required=True, help="Output directory for the PDFs")
+    batch.add_argument("--results", help="JSONL result log (default: OUTPUT/results.jsonl, '-' for stdout)")
+    batch.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    batch.add_argument("--max-in-flight", type=int, help="Jobs dispatched but not yet written (default: 4 per worker)")
+    add_settings_arguments(batch)
+    batch.set_defaults(handler=run_batch_file)
+
+    serve = commands.add_parser("serve", help="Run the local HTTP render service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes")
+    serve.add_argument("--queue-size", type=int, default=16, help="Requests allowed to wait for a worker")
+    add_settings_arguments(serve)
+    serve.set_defaults(handler=run_server)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_render_log(args.render_log)
+    return args.handler(args)
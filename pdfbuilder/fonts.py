@@ -0,0 +1,131 @@
+"""Font loading for the render engine"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+FALLBACK_FONT = 'Helvetica'
+
+
+@dataclass(frozen=True)
+class FontInfo:
+    """A parsed font held by the registry"""
+    name: str
+    path: str
+    sha256: str
+    file_bytes: int
+    memory_bytes: int
+    parse_seconds: float
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _estimate_size(obj):
+    """Rough memory estimate for a parsed font: the object plus its containers"""
+    total = sys.getsizeof(obj)
+    for value in vars(obj).values():
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        elif isinstance(value, (list, tuple)):
+            total += sum(sys.getsizeof(v) for v in value)
+    return total
+
+
+class FontRegistry:
+    """Process-wide cache of parsed TrueType fonts.
+
+    Fonts are keyed by resolved path plus content hash, so each file is
+    parsed once per process and the TTFont object is shared by every
+    render. All writes to reportlab's global ``pdfmetrics`` tables happen
+    under one lock.
+    """
+
+    def __init__(self, prefix='Arabic'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._fonts = {}  # (path, sha256) -> FontInfo
+        self._digests = {}  # (path, size, mtime_ns) -> sha256
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, path):
+        """Hash a font file, reusing the digest while size and mtime are unchanged"""
+        st = os.stat(path)
+        stamp = (path, st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            digest = self._digests[stamp] = file_sha256(path)
+        return digest
+
+    def register(self, font_path):
+        """Parse and register font_path once, returning its reportlab font name"""
+        path = os.path.realpath(font_path)
+        with self._lock:
+            digest = self.digest(path)
+            info = self._fonts.get((path, digest))
+            if info is not None:
+                self.hits += 1
+                return info.name
+
+            self.misses += 1
+            name = f"{self.prefix}-{digest[:12]}"
+            start = time.perf_counter()
+            pdfmetrics.registerFont(TTFont(name, path))
+            # reportlab reuses an earlier font object registered under the same face name
+            font = pdfmetrics.getFont(name)
+            parse_seconds = time.perf_counter() - start
+
+            self._fonts[(path, digest)] = FontInfo(
+                name=name,
+                path=path,
+                sha256=digest,
+                file_bytes=os.path.getsize(path),
+                memory_bytes=_estimate_size(font.face),
+                parse_seconds=parse_seconds,
+            )
+            return name
+
+    def fonts(self):
+        """Return FontInfo for every font parsed so far"""
+        with self._lock:
+            return list(self._fonts.values())
+
+    def memory_report(self):
+        """Return estimated parsed size in bytes per registered font name"""
+        return {info.name: info.memory_bytes for info in self.fonts()}
+
+    def stats(self):
+        """Return lookup counters"""
+        return {"hits": self.hits, "misses": self.misses, "fonts": len(self._fonts)}
+
+
+# Shared by every session, thread and render in this process
+default_registry = FontRegistry()
+
+
+def load_font(font_path, registry=None):
+    """Register the Arabic font and return (font_name, warning).
+
+    Falls back to Helvetica when the font file is missing or cannot be
+    parsed; ``warning`` then explains why, otherwise it is None.
+    """
+    registry = registry or default_registry
+    try:
+        if font_path and os.path.exists(font_path):
+            return registry.register(font_path), None
+        return FALLBACK_FONT, "Arabic font not available, using fallback."
+    except Exception as e:
+        return FALLBACK_FONT, f"Could not load Arabic font: {e}"
@@ -0,0 +1,142 @@
+"""Incremental re-layout: keep one session's last layout and re-flow only what an edit changed"""
+import threading
+from dataclasses import astuple
+
+from .layout import layout_frame, page_geometry, wrap_text
+from .pagination import PagePlan, iter_pages
+from .parallel import default_shaping_pool, use_parallel_shaping
+from .timing import StageTimer
+
+
+class LayoutSession:
+    """Wrapped lines and page plan of the last document laid out in one session.
+
+    The next layout compares paragraphs with the previous ones, keeps
+    the lines of the unchanged paragraphs before and after the edit, and
+    reshapes and wraps only the paragraphs in between. Pages before the
+    first changed line are unchanged, and when the edit keeps the line
+    count, so is every page after it. Any change to the font, size,
+    spacing, margins or title starts over from scratch.
+
+    The session is only read at the start of a layout and replaced once
+    the layout has run to the end, so a cancelled or failed render leaves
+    the previous one in place and renders from one session never wait on
+    each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None  # (key, paragraphs, line count per paragraph, lines, PagePlan)
+        self.last_stats = {}
+
+    def iter_pages(self, document, settings, font_name, shaping_cache=None, timer=None, progress=None):
+        """Return (Layout, pages) for document; pages yields (PageSlice, page_lines) as they fill up.
+
+        Reused lines come first, changed paragraphs are wrapped as the pages
+        reach them, and progress (a RenderProgress), if given, is checked
+        before each one. The session is updated when pages is exhausted.
+        """
+        timer = timer or StageTimer()
+        layout = layout_frame(document, settings, font_name, shaping_cache, timer)
+        key = (font_name, settings.font_size, astuple(page_geometry(settings)), tuple(layout.title_lines),
+               layout.line_height, layout.lines_on_first_page, layout.lines_per_page)
+        paragraphs = document.body.split('\n')
+
+        with self._lock:
+            state = self._state
+        if state is not None and state[0] == key:
+            _, old_paragraphs, old_counts, old_lines, old_plan = state
+        else:
+            old_paragraphs, old_counts, old_lines, old_plan = [], [], [], None
+
+        limit = min(len(old_paragraphs), len(paragraphs))
+        prefix = 0
+        while prefix < limit and old_paragraphs[prefix] == paragraphs[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_paragraphs[-1 - suffix] == paragraphs[-1 - suffix]:
+            suffix += 1
+
+        # Lines of the unchanged paragraphs before and after the edit are kept as they are
+        head_lines = sum(old_counts[:prefix])
+        tail_lines = sum(old_counts[len(old_counts) - suffix:])
+        head = old_lines[:head_lines]
+        tail = old_lines[len(old_lines) - tail_lines:]
+        changed = paragraphs[prefix:len(paragraphs) - suffix]
+        counts = old_counts[:prefix]
+        middle = []
+
+        def lines():
+            yield from head
+            width = layout.geometry.text_width
+            # Length of the changed text with its line breaks, without joining it
+            if shaping_cache is None and use_parallel_shaping(sum(map(len, changed)) + len(changed)):
+                wrapped = default_shaping_pool.iter_paragraphs(changed, settings.font_path, settings.font_size,
+                                                               width, timer)
+            else:
+                wrapped = (wrap_text(paragraph, font_name, settings.font_size, width, shaping_cache, timer=timer)
+                           for paragraph in changed)
+            for paragraph_lines in wrapped:
+                if progress is not None:
+                    progress.check()
+                counts.append(len(paragraph_lines))
+                middle.extend(paragraph_lines)
+                yield from paragraph_lines
+            yield from tail
+
+        def pages():
+            slices = []
+            for page, page_lines in iter_pages(layout, lines(), timer):
+                slices.append(page)
+                yield page, page_lines
+
+            all_lines = head + middle + tail
+            plan = PagePlan(pages=tuple(slices), line_height=layout.line_height)
+            reflowed = self._reflowed_pages(old_plan if old_paragraphs else None, plan, head_lines,
+                                            len(all_lines) - tail_lines, len(all_lines) - len(old_lines))
+            counts.extend(old_counts[len(old_counts) - suffix:])
+            with self._lock:
+                self._state = (key, paragraphs, counts, all_lines, plan)
+                self.last_stats = {
+                    "paragraphs": len(paragraphs),
+                    "paragraphs_reflowed": len(changed),
+                    "paragraphs_reused": len(paragraphs) - len(changed),
+                    "pages": plan.total_pages,
+                    "pages_reflowed": len(reflowed),
+                    "first_reflowed_page": min(reflowed) if reflowed else None,
+                    "last_reflowed_page": max(reflowed) if reflowed else None,
+                }
+            layout.lines = all_lines
+
+        return layout, pages()
+
+    def layout(self, document, settings, font_name, shaping_cache=None, timer=None, progress=None):
+        """Return (Layout, PagePlan) for document, reusing the previous layout where possible"""
+        layout, pages = self.iter_pages(document, settings, font_name, shaping_cache, timer, progress)
+        plan = PagePlan(pages=tuple(page for page, _ in pages), line_height=layout.line_height)
+        return layout, plan
+
+    @staticmethod
+    def _reflowed_pages(old_plan, plan, first_changed, end_changed, delta):
+        """Page numbers whose lines differ from the previous plan.
+
+        Pages ending before the first changed line are the same. After the
+        edited lines, page boundaries line up with the old ones again only
+        if the edit kept the line count; otherwise every later page shifts.
+        """
+        if old_plan is None:
+            return list(range(1, plan.total_pages + 1))
+        reflowed = []
+        for page in plan.pages:
+            if page.stop <= first_changed and page.number <= old_plan.total_pages \
+                    and old_plan.page(page.number) == page:
+                continue
+            if delta == 0 and page.start >= end_changed and page.number <= old_plan.total_pages \
+                    and old_plan.page(page.number) == page:
+                continue
+            reflowed.append(page.number)
+        return reflowed
+
+    def clear(self):
+        with self._lock:
+            self._state = None
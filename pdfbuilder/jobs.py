@@ -0,0 +1,159 @@
+"""Background renders for interactive front ends, with process-wide admission control"""
+import os
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .layout import page_geometry
+from .render import RenderCancelled, RenderProgress
+
+RENDER_WORKERS_ENV = "PDFBUILDER_RENDER_WORKERS"
+RENDER_MEMORY_ENV = "PDFBUILDER_RENDER_MEMORY_MB"
+
+# Peak memory of one render, measured with tracemalloc on A4 pages
+BASE_RENDER_BYTES = 2 * 1024 * 1024
+BYTES_PER_CHAR = 12
+BYTES_PER_PAGE = 24 * 1024
+
+
+def estimate_pages(document, settings):
+    """Rough page count from the input length, before any layout is done"""
+    geometry = page_geometry(settings)
+    chars_per_line = max(1.0, geometry.text_width / (settings.font_size * 0.55))
+    lines_per_page = max(1.0, geometry.text_height / (settings.font_size * settings.line_spacing))
+    lines = len(document.body) / chars_per_line + document.body.count("\n")
+    return 1 + int(lines / lines_per_page)
+
+
+def estimate_render_bytes(document, settings):
+    """Expected peak memory of rendering document, from its length and page count"""
+    chars = len(document.body) + len(document.title)
+    return BASE_RENDER_BYTES + chars * BYTES_PER_CHAR + estimate_pages(document, settings) * BYTES_PER_PAGE
+
+
+class RenderJob:
+    """One render submitted to a BackgroundRenderer.
+
+    Holds the inputs, a live RenderProgress and the future for the result,
+    so a UI can poll it across reruns, show its place in the queue and
+    cancel it. warning is free for the UI to keep a message (such as a font
+    fallback) to show alongside the result.
+    """
+
+    def __init__(self, document, settings, estimated_bytes, estimated_pages):
+        self.document = document
+        self.settings = settings
+        self.estimated_bytes = estimated_bytes
+        self.estimated_pages = estimated_pages
+        self.progress = RenderProgress()
+        self.future = Future()
+        self.traceback = None
+        self.position = None
+        self.warning = None
+
+    def cancel(self):
+        """Stop the render: drop it if still queued, else at the next page boundary"""
+        self.progress.cancel()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def cancelled(self):
+        if self.future.cancelled():
+            return True
+        return self.future.done() and isinstance(self.future.exception(), RenderCancelled)
+
+    def result(self):
+        return self.future.result()
+
+    def exception(self):
+        return self.future.exception()
+
+
+class BackgroundRenderer:
+    """Process-wide render scheduler.
+
+    At most max_workers renders run at once, and a render is only started
+    while the memory estimates of the running ones stay under
+    memory_budget bytes (a render is always admitted when nothing else is
+    running). Waiting jobs are started strictly in submission order, so a
+    large job is not overtaken indefinitely by small ones.
+    """
+
+    def __init__(self, max_workers=None, memory_budget=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get(RENDER_WORKERS_ENV) or min(4, os.cpu_count() or 1))
+        if memory_budget is None:
+            memory_budget = int(os.environ.get(RENDER_MEMORY_ENV) or 1024) * 1024 * 1024
+        self.max_workers = max_workers
+        self.memory_budget = memory_budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-render")
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._running = set()
+        self._running_bytes = 0
+        self.admitted = 0
+        self.completed = 0
+
+    def submit(self, render, document, settings):
+        """Queue render(document, settings, progress=...) in the background; returns a RenderJob"""
+        job = RenderJob(document, settings, estimate_render_bytes(document, settings),
+                        estimate_pages(document, settings))
+        job.future.add_done_callback(lambda _: self._finished(job))
+        with self._lock:
+            self._queue.append((job, render))
+            self._admit()
+        return job
+
+    def _fits(self, job):
+        if len(self._running) >= self.max_workers:
+            return False
+        return not self._running or self._running_bytes + job.estimated_bytes <= self.memory_budget
+
+    def _admit(self):
+        """Start queued jobs from the head while they fit; call with the lock held"""
+        self._queue = deque(item for item in self._queue if not item[0].future.cancelled())
+        while self._queue:
+            job, render = self._queue[0]
+            if not self._fits(job):
+                break
+            self._queue.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            self._running.add(job)
+            self._running_bytes += job.estimated_bytes
+            self.admitted += 1
+            job.position = 0
+            self._executor.submit(self._run, job, render)
+        for position, (job, _) in enumerate(self._queue, 1):
+            job.position = position
+
+    def _run(self, job, render):
+        try:
+            job.future.set_result(render(job.document, job.settings, progress=job.progress))
+        except RenderCancelled as e:
+            job.future.set_exception(e)
+        except Exception as e:
+            job.traceback = traceback.format_exc()
+            job.future.set_exception(e)
+
+    def _finished(self, job):
+        with self._lock:
+            if job in self._running:
+                self._running.discard(job)
+                self._running_bytes -= job.estimated_bytes
+                self.completed += 1
+            self._admit()
+
+    def stats(self):
+        """Return running/queued counts and the memory reserved by running renders"""
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "reserved_bytes": self._running_bytes,
+                "admitted": self.admitted,
+                "completed": self.completed,
+            }
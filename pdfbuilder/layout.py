@@ -0,0 +1,173 @@
+"""Layout stage: shape the text, wrap it into lines and size the pages"""
+from dataclasses import dataclass
+from typing import List
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from .linebreak import break_lines, default_word_widths
+from .model import mm_to_points
+from .parallel import default_shaping_pool, use_parallel_shaping
+from .shaping import NEEDS_BIDI, NEEDS_RESHAPE, RTL, default_shaping_cache, paragraph_direction, paragraph_script, \
+    script_flags
+from .timing import StageTimer
+
+# Spacing between the title block and the body text
+TITLE_SPACING = 20
+
+
+@dataclass(frozen=True)
+class PageGeometry:
+    """Page size, margins and text area, all in points"""
+    page_width: float
+    page_height: float
+    margin_top: float
+    margin_bottom: float
+    margin_left: float
+    margin_right: float
+
+    @property
+    def text_width(self):
+        return self.page_width - self.margin_left - self.margin_right
+
+    @property
+    def text_height(self):
+        return self.page_height - self.margin_top - self.margin_bottom
+
+
+@dataclass
+class Layout:
+    """Everything the render stage needs to draw a document"""
+    font_name: str
+    geometry: PageGeometry
+    title_lines: List[str]
+    title_line_height: float
+    lines: List[str]
+    line_height: float
+    lines_on_first_page: int
+    lines_per_page: int
+
+
+def page_geometry(settings, pagesize=A4):
+    """Convert the settings margins (mm) into a PageGeometry"""
+    page_width, page_height = pagesize
+    return PageGeometry(
+        page_width=page_width,
+        page_height=page_height,
+        margin_top=mm_to_points(settings.margin_top),
+        margin_bottom=mm_to_points(settings.margin_bottom),
+        margin_left=mm_to_points(settings.margin_left),
+        margin_right=mm_to_points(settings.margin_right),
+    )
+
+
+def wrap_paragraph(paragraph, font_name, font_size, width, shaping_cache=None, word_widths=None, timer=None):
+    """Wrap one paragraph in logical order, then reorder each line for display.
+
+    A paragraph without Arabic letters is not reshaped, and one without
+    right-to-left text or bidi controls is not reordered: both would
+    return it unchanged. timer, if given, is charged with the script,
+    reshape, wrap and bidi stages.
+    """
+    shaping_cache = shaping_cache or default_shaping_cache
+    word_widths = word_widths or default_word_widths
+    timer = timer or StageTimer()
+
+    with timer.stage("script"):
+        flags = script_flags(paragraph)
+    if flags & NEEDS_RESHAPE:
+        with timer.stage("reshape"):
+            reshaped = shaping_cache.reshape(paragraph)
+    else:
+        reshaped = paragraph
+    with timer.stage("wrap"):
+        words = reshaped.split()
+        widths = word_widths.widths(words, font_name, font_size)
+        space_width = stringWidth(' ', font_name, font_size)
+        ranges = break_lines(widths, space_width, width)
+    if not flags & (RTL | NEEDS_BIDI):
+        shaping_cache.count_skipped(paragraph_script(flags), 0 if flags & NEEDS_RESHAPE else len(paragraph),
+                                    len(ranges))
+        return [' '.join(words[start:stop]) for start, stop in ranges]
+    shaping_cache.count_skipped(paragraph_script(flags), 0 if flags & NEEDS_RESHAPE else len(paragraph))
+    with timer.stage("bidi"):
+        base_dir = paragraph_direction(reshaped)
+        return [shaping_cache.display(' '.join(words[start:stop]), base_dir) for start, stop in ranges]
+
+
+def iter_paragraphs(text):
+    """Yield the paragraphs of text one at a time, without splitting it all up front"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_lines(text, font_name, font_size, width, shaping_cache=None, word_widths=None, timer=None):
+    """Yield display lines that fit the width, one paragraph at a time"""
+    timer = timer or StageTimer()
+    for paragraph in iter_paragraphs(text):
+        if paragraph.strip():
+            yield from wrap_paragraph(paragraph, font_name, font_size, width, shaping_cache, word_widths, timer)
+        else:
+            yield ''  # Empty line for paragraph breaks
+
+
+def wrap_text(text, font_name, font_size, width, shaping_cache=None, word_widths=None, timer=None):
+    """Split text into display lines that fit the width"""
+    return list(iter_lines(text, font_name, font_size, width, shaping_cache, word_widths, timer))
+
+
+def body_lines(document, settings, font_name, shaping_cache=None, timer=None):
+    """Yield the body's display lines in order, shaping only as far as they are consumed"""
+    width = page_geometry(settings).text_width
+    if shaping_cache is None and use_parallel_shaping(len(document.body)):
+        # Very large bodies are shaped paragraph-chunk by chunk across worker processes
+        return default_shaping_pool.iter_lines(document.body, settings.font_path, settings.font_size, width, timer)
+    return iter_lines(document.body, font_name, settings.font_size, width, shaping_cache, timer=timer)
+
+
+def layout_frame(document, settings, font_name, shaping_cache=None, timer=None):
+    """Everything about a document's layout except its body lines (left empty)"""
+    timer = timer or StageTimer()
+    geometry = page_geometry(settings)
+    text_width = geometry.text_width
+
+    # Process title if provided
+    title_lines = []
+    title_line_height = settings.title_font_size * 1.5
+    title_height = 0
+    if document.title and document.title.strip():
+        # Split title into lines if too long
+        title_lines = wrap_text(document.title.strip(), font_name, settings.title_font_size,
+                                text_width, shaping_cache, timer=timer)
+        title_height = len(title_lines) * title_line_height + TITLE_SPACING
+
+    line_height = settings.font_size * settings.line_spacing
+
+    # First page has less space due to title
+    first_page_text_height = geometry.text_height - title_height
+    lines_on_first_page = int(first_page_text_height / line_height) if first_page_text_height > 0 else 0
+    lines_per_page = int(geometry.text_height / line_height)
+
+    return Layout(
+        font_name=font_name,
+        geometry=geometry,
+        title_lines=title_lines,
+        title_line_height=title_line_height,
+        lines=[],
+        line_height=line_height,
+        lines_on_first_page=lines_on_first_page,
+        lines_per_page=lines_per_page,
+    )
+
+
+def layout_document(document, settings, font_name, shaping_cache=None, timer=None):
+    """Shape, wrap and size a document for rendering with font_name"""
+    layout = layout_frame(document, settings, font_name, shaping_cache, timer)
+    layout.lines = list(body_lines(document, settings, font_name, shaping_cache, timer))
+    return layout
@@ -0,0 +1,92 @@
+"""Greedy line breaking over logical-order words with cached word widths"""
+import threading
+
+import numpy as np
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+class WordWidthCache:
+    """Width of each distinct word, measured once per (font, size).
+
+    Bounded like the shaping cache, but without per-lookup LRU bookkeeping
+    in the hot loop: a table that grows past max_words is cleared and
+    refilled, and past max_tables the oldest (font, size) table is dropped.
+    """
+
+    def __init__(self, max_words=200_000, max_tables=32):
+        self.max_words = max_words
+        self.max_tables = max_tables
+        self._tables = {}  # (font_name, font_size) -> {word: width}, oldest first
+        self._lock = threading.Lock()
+        self.resets = 0
+
+    def table(self, font_name, font_size):
+        """Return the word -> width dict for a font and size"""
+        key = (font_name, font_size)
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    while len(self._tables) >= self.max_tables:
+                        del self._tables[next(iter(self._tables))]
+                    table = self._tables[key] = {}
+        return table
+
+    def widths(self, words, font_name, font_size):
+        """Return the width of each word, measuring only unseen ones"""
+        table = self.table(font_name, font_size)
+        result = []
+        for word in words:
+            width = table.get(word)
+            if width is None:
+                width = table[word] = stringWidth(word, font_name, font_size)
+            result.append(width)
+        if len(table) > self.max_words:
+            # Vocabulary this large is mostly one-off tokens; start the table over
+            table.clear()
+            with self._lock:
+                self.resets += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self.resets = 0
+
+    def stats(self):
+        """Return the number of tables, words held and table resets"""
+        tables = list(self._tables.values())
+        return {"tables": len(tables), "words": sum(map(len, tables)), "max_words": self.max_words,
+                "resets": self.resets}
+
+
+# Shared by every render in this process
+default_word_widths = WordWidthCache()
+
+
+def break_lines(widths, space_width, max_width):
+    """Split words with the given widths into lines no wider than max_width.
+
+    Same greedy rule as reportlab's simpleSplit: a word joins the current
+    line if it still fits, and a line always takes at least one word. Line
+    ends are found by binary search over cumulative widths instead of
+    re-measuring candidate strings. Returns (start, stop) word index ranges.
+    """
+    count = len(widths)
+    if not count:
+        return []
+
+    # cumulative[k] is the width of words 0..k-1, each followed by a space
+    cumulative = np.zeros(count + 1)
+    np.cumsum(np.asarray(widths, dtype=float) + space_width, out=cumulative[1:])
+
+    # Words start..stop-1 fit when cumulative[stop] - cumulative[start] - space_width <= max_width
+    ranges = []
+    start = 0
+    while start < count:
+        limit = cumulative[start] + space_width + max_width
+        stop = max(int(np.searchsorted(cumulative, limit, side='right')) - 1, start + 1)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
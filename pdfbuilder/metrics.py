@@ -0,0 +1,216 @@
+"""Prometheus text-format metrics for renders, render queues and caches.
+
+Scrape them from a side-thread HTTP server (PDFBUILDER_METRICS_PORT) or
+let node_exporter's textfile collector pick up a file rewritten every
+few seconds (PDFBUILDER_METRICS_TEXTFILE). Neither touches the app UI.
+"""
+import atexit
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fileutil import atomic_writer
+from .fonts import default_registry
+from .pagecache import default_page_cache
+from .shaping import default_shaping_cache
+
+METRICS_PORT_ENV = "PDFBUILDER_METRICS_PORT"
+METRICS_HOST_ENV = "PDFBUILDER_METRICS_HOST"
+METRICS_TEXTFILE_ENV = "PDFBUILDER_METRICS_TEXTFILE"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a one-line note to a very large document
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=""):
+        sep = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}'
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+class RenderMetrics:
+    """Render counters and latency histograms, plus gauges read from caches and queues at scrape time.
+
+    Caches register a stats() callable returning at least hits and
+    misses; queues register one returning running and queued counts.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.pages = 0
+        self.pages_reused = 0
+        self.lines = 0
+        self.bytes = 0
+        self.render_seconds = Histogram(buckets)
+        self.stage_seconds = {}
+        self._caches = {}
+        self._queues = {}
+
+    def observe_render(self, report):
+        """Count one finished render from its RenderReport"""
+        with self._lock:
+            self.renders += 1
+            self.pages += report.page_count
+            self.pages_reused += report.pages_reused
+            self.lines += report.line_count
+            self.bytes += report.byte_count
+            self.render_seconds.observe(sum(report.timings.values()))
+            for stage, seconds in report.timings.items():
+                if stage not in self.stage_seconds:
+                    self.stage_seconds[stage] = Histogram(self.buckets)
+                self.stage_seconds[stage].observe(seconds)
+
+    def register_cache(self, name, stats):
+        self._caches[name] = stats
+
+    def register_queue(self, name, stats):
+        self._queues[name] = stats
+
+    def render_text(self):
+        """Return every metric in the Prometheus text exposition format"""
+        out = []
+
+        def metric(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            metric("pdfbuilder_renders_total", "counter", "PDFs rendered")
+            out.append(f"pdfbuilder_renders_total {self.renders}")
+            metric("pdfbuilder_pages_rendered_total", "counter", "Pages drawn")
+            out.append(f"pdfbuilder_pages_rendered_total {self.pages}")
+            metric("pdfbuilder_pages_reused_total", "counter", "Pages whose text was spliced from the page cache")
+            out.append(f"pdfbuilder_pages_reused_total {self.pages_reused}")
+            metric("pdfbuilder_lines_rendered_total", "counter", "Body lines laid out")
+            out.append(f"pdfbuilder_lines_rendered_total {self.lines}")
+            metric("pdfbuilder_output_bytes_total", "counter", "PDF bytes written")
+            out.append(f"pdfbuilder_output_bytes_total {self.bytes}")
+            metric("pdfbuilder_render_seconds", "histogram", "Wall time of a whole render")
+            out.extend(self.render_seconds.lines("pdfbuilder_render_seconds"))
+            metric("pdfbuilder_render_stage_seconds", "histogram", "Wall time per render stage")
+            for stage, histogram in sorted(self.stage_seconds.items()):
+                out.extend(histogram.lines("pdfbuilder_render_stage_seconds", f'stage="{stage}"'))
+
+        queues = {name: stats() for name, stats in list(self._queues.items())}
+        metric("pdfbuilder_render_queue_depth", "gauge", "Renders waiting to start")
+        for name, stats in sorted(queues.items()):
+            out.append(f'pdfbuilder_render_queue_depth{{queue="{name}"}} {stats["queued"]}')
+        metric("pdfbuilder_renders_running", "gauge", "Renders in progress")
+        for name, stats in sorted(queues.items()):
+            out.append(f'pdfbuilder_renders_running{{queue="{name}"}} {stats["running"]}')
+
+        caches = {name: stats() for name, stats in list(self._caches.items())}
+        metric("pdfbuilder_cache_hits_total", "counter", "Cache lookups served from the cache")
+        for name, stats in sorted(caches.items()):
+            out.append(f'pdfbuilder_cache_hits_total{{cache="{name}"}} {stats["hits"]}')
+        metric("pdfbuilder_cache_misses_total", "counter", "Cache lookups that had to compute")
+        for name, stats in sorted(caches.items()):
+            out.append(f'pdfbuilder_cache_misses_total{{cache="{name}"}} {stats["misses"]}')
+        metric("pdfbuilder_cache_hit_ratio", "gauge", "Hits over lookups since start")
+        for name, stats in sorted(caches.items()):
+            lookups = stats["hits"] + stats["misses"]
+            out.append(f'pdfbuilder_cache_hit_ratio{{cache="{name}"}} {stats["hits"] / lookups if lookups else 0.0}')
+
+        shaping = caches.get("shaping")
+        if shaping and "paragraphs" in shaping:
+            metric("pdfbuilder_paragraphs_shaped_total", "counter", "Paragraphs wrapped, by script")
+            for script, count in sorted(shaping["paragraphs"].items()):
+                out.append(f'pdfbuilder_paragraphs_shaped_total{{script="{script}"}} {count}')
+            metric("pdfbuilder_shaping_skipped_total", "counter",
+                   "Reshape calls (per paragraph) and bidi reorders (per line) skipped by the script fast path")
+            out.append(f'pdfbuilder_shaping_skipped_total{{step="reshape"}} {shaping["reshapes_skipped"]}')
+            out.append(f'pdfbuilder_shaping_skipped_total{{step="bidi"}} {shaping["displays_skipped"]}')
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path):
+        """Write the metrics for a textfile collector; readers never see a partial file"""
+        with atomic_writer(path, 'w') as f:
+            f.write(self.render_text())
+
+
+# Shared by every render in this process
+default_metrics = RenderMetrics()
+default_metrics.register_cache("font", default_registry.stats)
+default_metrics.register_cache("shaping", default_shaping_cache.stats)
+default_metrics.register_cache("page", default_page_cache.stats)
+
+
+def start_metrics_server(port, host="127.0.0.1", metrics=None):
+    """Serve GET /metrics from a daemon thread; returns the server"""
+    metrics = metrics or default_metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="pdfbuilder-metrics", daemon=True).start()
+    return server
+
+
+def start_textfile_writer(path, interval=15.0, metrics=None):
+    """Rewrite path every interval seconds from a daemon thread, and once more at exit"""
+    metrics = metrics or default_metrics
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            metrics.write_textfile(path)
+
+    metrics.write_textfile(path)
+    atexit.register(lambda: metrics.write_textfile(path))
+    threading.Thread(target=loop, name="pdfbuilder-metrics-textfile", daemon=True).start()
+    return stop
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_metrics_exporter():
+    """Start whichever exporters the environment asks for, once per process"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        if os.environ.get(METRICS_PORT_ENV):
+            start_metrics_server(int(os.environ[METRICS_PORT_ENV]), os.environ.get(METRICS_HOST_ENV, "127.0.0.1"))
+        if os.environ.get(METRICS_TEXTFILE_ENV):
+            start_textfile_writer(os.environ[METRICS_TEXTFILE_ENV])
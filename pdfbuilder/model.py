@@ -0,0 +1,41 @@
+"""Document and settings model shared by the layout and render stages"""
+from dataclasses import dataclass
+from typing import Optional
+
+# Alignment choices, in the order shown by the sidebar
+ALIGN_RIGHT = "Right (Arabic)"
+ALIGN_CENTER = "Center"
+ALIGN_JUSTIFY = "Justify"
+ALIGNMENTS = [ALIGN_RIGHT, ALIGN_CENTER, ALIGN_JUSTIFY]
+
+
+def mm_to_points(mm):
+    """Convert millimeters to points"""
+    return mm * 2.83465
+
+
+@dataclass(frozen=True)
+class Document:
+    """Text content of a PDF: optional title plus body text"""
+    body: str
+    title: str = ""
+
+
+@dataclass(frozen=True)
+class PDFSettings:
+    """Page and typography settings (margins are in millimeters)"""
+    title_font_size: int = 24
+    title_bold: bool = True
+    font_size: int = 14
+    line_spacing: float = 1.5
+    margin_top: float = 35
+    margin_bottom: float = 35
+    margin_left: float = 25
+    margin_right: float = 25
+    text_align: str = ALIGN_RIGHT
+    font_path: Optional[str] = None
+    border_style: Optional[str] = "decorative"
+
+    def __post_init__(self):
+        if self.text_align not in ALIGNMENTS:
+            raise ValueError(f"Unknown text alignment: {self.text_align!r}")
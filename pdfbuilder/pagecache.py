@@ -0,0 +1,151 @@
+"""Cache of drawn page text as PDF content-stream operators"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from reportlab.pdfbase import pdfmetrics
+
+
+def _supported(c, font):
+    """Whether c and font expose the reportlab internals the cache reads and splices into.
+
+    They are private, so a reportlab version without them (requirements.txt
+    pins a tested one) makes every page be drawn instead of failing the render.
+    """
+    return (getattr(font, "_dynamicFont", False) and hasattr(getattr(font, "state", None), "get")
+            and hasattr(font, "splitString") and hasattr(font, "getSubsetInternalName")
+            and isinstance(getattr(c, "_code", None), list) and hasattr(c, "_doc")
+            and all(hasattr(c, name) for name in ("_fontname", "_fontsize", "_leading")))
+
+
+def _assignments(font, doc):
+    """Codepoint -> subset code assigned so far in doc, or None if the font state has no such map"""
+    state = font.state.get(doc)
+    return getattr(state, "assignments", None) if state is not None else {}
+
+
+def _codepoint(ch):
+    """The codepoint reportlab encodes ch as; no-break spaces are written as spaces"""
+    return 32 if ch == '\xa0' else ord(ch)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    code: tuple  # operators appended to the canvas while drawing
+    codes: dict  # character -> subset code it was encoded with, None if the font lacks it
+    subsets: tuple  # subsets the operators refer to
+    font: tuple  # canvas (font name, size, leading) after drawing
+    size: int
+
+
+class PageContentCache:
+    """Bounded LRU cache of a page's title and body text, as drawn operators.
+
+    Text in a TrueType font is written as codes into font subsets that each
+    document assigns in order of first use, so cached operators are only
+    valid while the document assigns the same codes to the page's
+    characters. A hit first assigns any new characters exactly as drawing
+    would have, then checks every character; if one differs (an edit
+    earlier in the document introduced characters in another order) the
+    page is drawn again. Fonts without subsets (the Helvetica fallback) are
+    always drawn, as is everything when the reportlab internals this relies
+    on are missing.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def draw(self, c, font_name, key, strings, draw):
+        """Draw one page's text onto canvas c, from the cache when possible.
+
+        key identifies everything draw() paints besides the font's codes;
+        strings are the texts it draws, in drawing order; draw() paints them
+        onto the current page. Returns True if cached operators were used.
+        """
+        font = pdfmetrics.getFont(font_name)
+        if not _supported(c, font):
+            draw()
+            return False
+
+        doc = c._doc
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        stale = entry is not None
+        if stale and self._replay(font, doc, entry, strings):
+            c._code.extend(entry.code)
+            c.setFont(*entry.font)
+            with self._lock:
+                self.hits += 1
+            return True
+
+        start = len(c._code)
+        draw()
+        code = tuple(c._code[start:])
+        assignments = _assignments(font, doc)
+        if assignments is None:
+            return False
+        codes = {ch: assignments.get(_codepoint(ch)) for ch in set(''.join(strings))}
+        entry = _Entry(
+            code=code,
+            codes=codes,
+            subsets=tuple(sorted({n >> 8 for n in codes.values() if n is not None})),
+            font=(c._fontname, c._fontsize, c._leading),
+            size=sum(map(len, code)) + sum(map(len, strings)),
+        )
+        with self._lock:
+            self.misses += 1
+            self.stale += stale
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+        return False
+
+    @staticmethod
+    def _replay(font, doc, entry, strings):
+        """Bring doc's font subsets to where drawing strings would; True if entry's codes still hold"""
+        assignments = _assignments(font, doc)
+        if assignments is None:
+            return False
+        if any(code is not None and _codepoint(ch) not in assignments for ch, code in entry.codes.items()):
+            # Assign new characters in drawing order, exactly as drawing would
+            for text in strings:
+                font.splitString(text, doc)
+            assignments = _assignments(font, doc)
+            if assignments is None:
+                return False
+        for ch, code in entry.codes.items():
+            if assignments.get(_codepoint(ch)) != code:
+                return False
+        for subset in entry.subsets:
+            font.getSubsetInternalName(subset, doc)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.stale = 0
+
+    def stats(self):
+        """Return page hit/miss counters and current size"""
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale, "pages": len(self._entries),
+                "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+# Shared by every render in this process
+default_page_cache = PageContentCache()
@@ -0,0 +1,80 @@
+"""Pagination stage: turn wrapped lines into pages, all at once or as they stream in"""
+from dataclasses import dataclass
+from itertools import islice
+from typing import Tuple
+
+from .layout import TITLE_SPACING
+from .timing import StageTimer
+
+
+@dataclass(frozen=True)
+class PageSlice:
+    """Body lines [start, stop) drawn on one page, from baseline y_start down"""
+    number: int
+    start: int
+    stop: int
+    y_start: float
+    has_title: bool = False
+
+
+@dataclass(frozen=True)
+class PagePlan:
+    """Every page of a document, computed without drawing anything"""
+    pages: Tuple[PageSlice, ...]
+    line_height: float
+
+    @property
+    def total_pages(self):
+        return len(self.pages)
+
+    def page(self, number):
+        """Return the slice for a 1-based page number"""
+        return self.pages[number - 1]
+
+
+def iter_pages(layout, lines, timer=None):
+    """Yield (PageSlice, page_lines) for lines, an iterable, as soon as each page is full.
+
+    The first page makes room for the title. Only one page of lines is
+    held at a time, so lines can come straight from the layout generators.
+    timer, if given, is charged with the "paginate" stage; pulling lines
+    from a generator is left to the stages that produce them.
+    """
+    timer = timer or StageTimer()
+    if layout.lines_per_page <= 0:
+        raise ValueError("Margins and line spacing leave no room for body text")
+
+    geometry = layout.geometry
+    top = geometry.page_height - geometry.margin_top
+    title_y = top
+    if layout.title_lines:
+        title_y -= len(layout.title_lines) * layout.title_line_height + TITLE_SPACING
+
+    lines = iter(lines)
+    number = 0
+    start = 0
+    while True:
+        first = number == 0
+        capacity = layout.lines_on_first_page if first else layout.lines_per_page
+        page_lines = list(islice(lines, capacity))
+        with timer.stage("paginate"):
+            # A title that fills the first page still gets it to itself
+            if not page_lines and not (first and layout.title_lines and capacity == 0):
+                return
+            number += 1
+            stop = start + len(page_lines)
+            page = PageSlice(
+                number=number,
+                start=start,
+                stop=stop,
+                y_start=title_y if first else top,
+                has_title=first and bool(layout.title_lines),
+            )
+        yield page, page_lines
+        start = stop
+
+
+def paginate(layout):
+    """Split a layout's body lines into pages; the first page makes room for the title"""
+    pages = tuple(page for page, _ in iter_pages(layout, layout.lines))
+    return PagePlan(pages=pages, line_height=layout.line_height)
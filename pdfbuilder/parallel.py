@@ -0,0 +1,145 @@
+"""Shape and wrap very large bodies across a process pool.
+
+Paragraphs are independent once the text is split at line breaks, so a
+large body is cut into chunks of whole paragraphs, each chunk is
+reshaped, wrapped and reordered in a worker process, and the lines are
+joined back in order. The output is the same as wrap_text in-process.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .fonts import load_font
+from .shaping import warm_script_table
+from .timing import StageTimer
+
+SHAPING_WORKERS_ENV = "PDFBUILDER_SHAPING_WORKERS"
+PARALLEL_MIN_CHARS_ENV = "PDFBUILDER_PARALLEL_MIN_CHARS"
+
+# Below this, pickling and process hops cost more than they save
+DEFAULT_MIN_CHARS = 1024 * 1024
+MIN_CHUNK_CHARS = 64 * 1024
+
+
+def shaping_workers():
+    """Worker count from $PDFBUILDER_SHAPING_WORKERS, default one per CPU"""
+    return int(os.environ.get(SHAPING_WORKERS_ENV) or os.cpu_count() or 1)
+
+
+def plan_chunks(paragraphs, workers):
+    """Group paragraphs into (start, stop) ranges of roughly equal size.
+
+    Aims for about four chunks per worker so a slow chunk does not hold up
+    the rest, but never below MIN_CHUNK_CHARS; a paragraph bigger than the
+    target becomes a chunk of its own.
+    """
+    total = sum(len(p) + 1 for p in paragraphs)
+    target = max(MIN_CHUNK_CHARS, total // (workers * 4) + 1)
+    chunks = []
+    start = size = 0
+    for index, paragraph in enumerate(paragraphs):
+        size += len(paragraph) + 1
+        if size >= target:
+            chunks.append((start, index + 1))
+            start, size = index + 1, 0
+    if start < len(paragraphs):
+        chunks.append((start, len(paragraphs)))
+    return chunks
+
+
+def warm_worker(font_path):
+    """Pool initializer: parse the font and build the script table before any job arrives"""
+    load_font(font_path)
+    warm_script_table()
+
+
+def _wrap_chunk(job):
+    """Worker side: wrap some paragraphs; returns (lines per paragraph, cpu seconds per stage)"""
+    from .layout import wrap_text
+
+    paragraphs, font_path, font_size, width = job
+    font_name, _ = load_font(font_path)
+    timer = StageTimer()
+    wrapped = [wrap_text(paragraph, font_name, font_size, width, timer=timer) for paragraph in paragraphs]
+    return wrapped, timer.cpu
+
+
+class ShapingPool:
+    """Lazily started process pool shared by every render in the process"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or shaping_workers()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                # The app is multi-threaded; forkserver avoids forking a process mid-render
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def start(self, font_path):
+        """Start the workers and warm them up ahead of the first render"""
+        list(self.executor().map(warm_worker, [font_path] * self.workers))
+
+    def iter_paragraphs(self, paragraphs, font_path, font_size, width, timer=None):
+        """Yield the wrapped lines of each paragraph from the pool, in order.
+
+        Worker CPU time goes to timer per stage. Only a few chunks per worker
+        are in flight at once, so finished lines do not pile up ahead of a
+        slow consumer.
+        """
+        timer = timer or StageTimer()
+        jobs = iter([(paragraphs[start:stop], font_path, font_size, width)
+                     for start, stop in plan_chunks(paragraphs, self.workers)])
+        executor = self.executor()
+        in_flight = deque(executor.submit(_wrap_chunk, job) for job in islice(jobs, self.workers * 2))
+        try:
+            while in_flight:
+                with timer.stage("shape"):
+                    wrapped, cpu = in_flight.popleft().result()
+                    for job in islice(jobs, 1):
+                        in_flight.append(executor.submit(_wrap_chunk, job))
+                for stage, seconds in cpu.items():
+                    timer.cpu[stage] = timer.cpu.get(stage, 0.0) + seconds
+                yield from wrapped
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def iter_lines(self, text, font_path, font_size, width, timer=None):
+        """Yield wrap_text's lines for text from the pool, in order"""
+        for lines in self.iter_paragraphs(text.split('\n'), font_path, font_size, width, timer):
+            yield from lines
+
+    def wrap_text(self, text, font_path, font_size, width, timer=None):
+        """wrap_text across the pool"""
+        return list(self.iter_lines(text, font_path, font_size, width, timer))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+default_shaping_pool = ShapingPool()
+
+
+def use_parallel_shaping(char_count, min_chars=None):
+    """Whether char_count characters of text are enough to shape in parallel here.
+
+    Never inside a worker process (batch jobs and the render service are
+    already parallel across documents), nor with a single worker.
+    """
+    if min_chars is None:
+        min_chars = int(os.environ.get(PARALLEL_MIN_CHARS_ENV) or DEFAULT_MIN_CHARS)
+    if char_count < min_chars or default_shaping_pool.workers <= 1:
+        return False
+    return multiprocessing.parent_process() is None
@@ -0,0 +1,324 @@
+"""Render stage: draw a Layout onto a reportlab canvas"""
+import os
+import threading
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from reportlab.pdfgen import canvas
+
+from .borders import draw_border
+from .fileutil import atomic_writer
+from .fonts import load_font
+from .layout import body_lines, layout_frame
+from .model import ALIGN_RIGHT, ALIGN_CENTER
+from .metrics import default_metrics
+from .pagecache import default_page_cache
+from .pagination import iter_pages, paginate
+from .timing import StageTimer, log_render
+
+
+# How reportlab's showPage() ends a finished page's content stream; stamp_footers() inserts before it
+PAGE_STREAM_END = '\n \n'
+
+
+@dataclass(frozen=True)
+class RenderReport:
+    """Summary of one finished render; timings and cpu_timings hold wall and CPU seconds per stage"""
+    page_count: int
+    byte_count: int
+    timings: dict = field(default_factory=dict)
+    cpu_timings: dict = field(default_factory=dict)
+    line_count: int = 0
+    layout_stats: dict = field(default_factory=dict)
+    pages_reused: int = 0
+
+
+class RenderCancelled(Exception):
+    """The render was cancelled between pages"""
+
+
+class RenderProgress:
+    """Progress of one render, written by the rendering thread and read by others.
+
+    cancel() asks the render to stop; it is checked between pages.
+    """
+
+    def __init__(self):
+        self.stage = "queued"
+        self.pages_laid_out = 0
+        self.pages_drawn = 0
+        self.total_pages = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        """Raise RenderCancelled if cancel() was called"""
+        if self._cancel.is_set():
+            raise RenderCancelled()
+
+
+class _CountingWriter:
+    """Pass writes through to a binary stream, counting the bytes"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.name = getattr(stream, 'name', None)
+        self.byte_count = 0
+
+    def write(self, data):
+        self.stream.write(data)
+        self.byte_count += len(data)
+        return len(data)
+
+
+def draw_body_line(c, layout, settings, line, y_position, is_last_line):
+    """Draw one body line using the configured alignment"""
+    geometry = layout.geometry
+    font_name = layout.font_name
+    font_size = settings.font_size
+    right_x = geometry.page_width - geometry.margin_right
+
+    if settings.text_align == ALIGN_RIGHT:
+        c.drawRightString(right_x, y_position, line)
+        return
+    if settings.text_align == ALIGN_CENTER:
+        c.drawCentredString(geometry.page_width / 2, y_position, line)
+        return
+
+    # Justify - last line of a paragraph stays right aligned
+    if is_last_line:
+        c.drawRightString(right_x, y_position, line)
+        return
+
+    text_width = geometry.text_width
+    line_width = c.stringWidth(line, font_name, font_size)
+    space_count = line.count(' ')
+
+    # Only justify if line is substantial and has spaces
+    if space_count > 0 and line_width > (text_width * 0.5):
+        extra_space = (text_width - line_width) / space_count
+
+        # Limit stretching
+        if extra_space < font_size * 1.0:
+            # Use text object with word spacing for perfect justification
+            text_obj = c.beginText()
+            text_obj.setTextOrigin(right_x - text_width, y_position)
+            text_obj.setFont(font_name, font_size)
+            text_obj.setWordSpace(c.stringWidth(' ', font_name, font_size) + extra_space)
+            text_obj.textLine(line)
+            c.drawText(text_obj)
+            return
+
+    # Short line or too much stretch - right align
+    c.drawRightString(right_x, y_position, line)
+
+
+def draw_footer(c, layout, number, total_pages):
+    c.setFont(layout.font_name, 10)
+    c.drawCentredString(layout.geometry.page_width / 2, 15, f"Page {number} of {total_pages}")
+
+
+def page_text_key(layout, settings, page, page_lines):
+    """Everything that decides how a page's title and body text are drawn"""
+    return (layout.font_name, settings.font_size, settings.title_font_size, settings.text_align, layout.geometry,
+            layout.line_height, layout.title_line_height, page.y_start,
+            tuple(layout.title_lines) if page.has_title else (), tuple(page_lines))
+
+
+def draw_page_text(c, layout, settings, page, page_lines):
+    """Draw a page's title (first page only) and body lines"""
+    geometry = layout.geometry
+    page_width, page_height = geometry.page_width, geometry.page_height
+    font_name = layout.font_name
+
+    # Draw title on first page only
+    if page.has_title:
+        c.setFont(font_name, settings.title_font_size)
+        y_position = page_height - geometry.margin_top
+        for title_line in layout.title_lines:
+            # Center align title
+            c.drawCentredString(page_width / 2, y_position, title_line)
+            y_position -= layout.title_line_height
+
+    # Draw body text
+    c.setFont(font_name, settings.font_size)
+    y_position = page.y_start
+    for i, line in enumerate(page_lines):
+        if line.strip():
+            # Last line of a paragraph (or of the page) is never justified
+            is_last_line = (i == len(page_lines) - 1) or not page_lines[i + 1].strip()
+            draw_body_line(c, layout, settings, line, y_position, is_last_line)
+        y_position -= layout.line_height
+
+
+def draw_page(c, layout, settings, page, total_pages, page_lines=None, page_cache=None):
+    """Draw one planned page: border, title, body lines and page number.
+
+    page_lines defaults to the page's slice of layout.lines. With
+    total_pages None the footer is left out for stamp_footers() to add
+    once the page count is known. With a
+    page_cache (a PageContentCache) the title and body text are spliced
+    in from an earlier render of the same page when possible. Returns
+    True if they were.
+    """
+    geometry = layout.geometry
+
+    # Draw decorative borders
+    if settings.border_style:
+        draw_border(c, settings.border_style, geometry.page_width, geometry.page_height)
+
+    if page_lines is None:
+        page_lines = layout.lines[page.start:page.stop]
+    if page_cache is None:
+        draw_page_text(c, layout, settings, page, page_lines)
+        reused = False
+    else:
+        strings = (list(layout.title_lines) if page.has_title else []) + [line for line in page_lines if line.strip()]
+        reused = page_cache.draw(c, layout.font_name, page_text_key(layout, settings, page, page_lines), strings,
+                                 lambda: draw_page_text(c, layout, settings, page, page_lines))
+
+    # Add page number
+    if total_pages is not None:
+        draw_footer(c, layout, page.number, total_pages)
+    return reused
+
+
+def stamp_footers(c, layout, total_pages):
+    """Add the page number footer to every page drawn with total_pages=None.
+
+    Pages closed by showPage() already sit in the document as content
+    streams. Each footer is drawn on the canvas, taken back off and
+    appended to its page's stream where draw_page() would have put it, so
+    the PDF is the same as drawing it in place. The current (last) page
+    gets its footer directly.
+
+    This relies on how reportlab lays out finished pages (see the version
+    pinned in requirements.txt); if a page does not look as expected it
+    raises rather than write a damaged PDF.
+    """
+    try:
+        pages = c._doc.Pages.pages
+        code = c._code
+    except AttributeError as e:
+        raise RuntimeError(f"cannot stamp footers with this reportlab version: {e}") from None
+    # showPage() ends every stream with a line holding a single space
+    if not all(isinstance(getattr(page, "stream", None), str) and page.stream.endswith(PAGE_STREAM_END)
+               for page in pages):
+        raise RuntimeError("cannot stamp footers: reportlab page streams do not end as expected")
+    for number, page in enumerate(pages, 1):
+        start = len(code)
+        draw_footer(c, layout, number, total_pages)
+        footer = code[start:]
+        del code[start:]
+        page.stream = page.stream[:-len(PAGE_STREAM_END)] + '\n' + '\n'.join(footer) + PAGE_STREAM_END
+    draw_footer(c, layout, len(pages) + 1, total_pages)
+
+
+def render_layout(layout, settings, output, plan=None, pages=None, timer=None, progress=None):
+    """Draw the planned pages of layout and write the PDF to output.
+
+    pages selects 1-based page numbers to draw (default: all of them);
+    page numbers in the footer always refer to the full plan. progress,
+    if given, counts pages drawn and can cancel the render between pages.
+    """
+    geometry = layout.geometry
+    plan = plan or paginate(layout)
+    numbers = range(1, plan.total_pages + 1) if pages is None else pages
+    timer = timer or StageTimer()
+    progress = progress or RenderProgress()
+
+    progress.stage = "drawing"
+    with timer.stage("draw"):
+        c = canvas.Canvas(output, pagesize=(geometry.page_width, geometry.page_height))
+        for index, number in enumerate(numbers):
+            progress.check()
+            if index:
+                c.showPage()
+            draw_page(c, layout, settings, plan.page(number), plan.total_pages)
+            progress.pages_drawn += 1
+
+    progress.check()
+    progress.stage = "saving"
+    with timer.stage("save"):
+        c.save()
+
+
+def write_pdf(document, settings, output, progress=None, layout_session=None, page_cache=default_page_cache):
+    """Render document and write the PDF to output, a path or writable binary stream.
+
+    Paragraphs are shaped, wrapped, paginated and drawn as one chain of
+    generators: each page is drawn as soon as its lines are known, and
+    only one page of lines is alive at a time. The "Page N of M" footers
+    are added once M is known. reportlab still assembles the file in
+    save(), which then goes straight to output (a file, pipe or HTTP
+    response body); a path is written via a temp file and only appears
+    once complete. progress (a RenderProgress) is updated as the render
+    goes and can cancel it between pages. With a layout_session (a
+    LayoutSession) only the paragraphs changed since that session's last
+    layout are re-wrapped; the PDF is the same either way. Pages whose
+    text was drawn before are spliced in from page_cache (None to draw
+    every page). Returns a RenderReport.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with atomic_writer(output) as f:
+            return write_pdf(document, settings, f, progress, layout_session, page_cache)
+
+    if not document.body.strip():
+        raise ValueError("Document body is empty")
+
+    timer = StageTimer()
+    progress = progress or RenderProgress()
+    progress.check()
+    progress.stage = "drawing"
+    with timer.stage("font"):
+        font_name, _ = load_font(settings.font_path)
+    if layout_session is not None:
+        layout, pages = layout_session.iter_pages(document, settings, font_name, timer=timer, progress=progress)
+    else:
+        layout = layout_frame(document, settings, font_name, timer=timer)
+        pages = iter_pages(layout, body_lines(document, settings, font_name, timer=timer), timer)
+
+    writer = _CountingWriter(output)
+    geometry = layout.geometry
+    c = canvas.Canvas(writer, pagesize=(geometry.page_width, geometry.page_height))
+    page_count = line_count = pages_reused = 0
+    for page, page_lines in pages:
+        progress.check()
+        progress.pages_laid_out += 1
+        with timer.stage("draw"):
+            if page_count:
+                c.showPage()
+            pages_reused += draw_page(c, layout, settings, page, None, page_lines, page_cache)
+        page_count += 1
+        line_count += len(page_lines)
+        progress.pages_drawn += 1
+
+    progress.total_pages = page_count
+    with timer.stage("draw"):
+        stamp_footers(c, layout, page_count)
+
+    progress.check()
+    progress.stage = "saving"
+    with timer.stage("save"):
+        c.save()
+    progress.stage = "done"
+    report = RenderReport(page_count=page_count, byte_count=writer.byte_count, timings=timer.stages,
+                          cpu_timings=timer.cpu, line_count=line_count,
+                          layout_stats=dict(layout_session.last_stats) if layout_session is not None else {},
+                          pages_reused=pages_reused)
+    log_render(report, char_count=len(document.body), text_align=settings.text_align)
+    default_metrics.observe_render(report)
+    return report
+
+
+def build_pdf(document, settings):
+    """Render document with settings and return the PDF bytes"""
+    buffer = BytesIO()
+    write_pdf(document, settings, buffer)
+    return buffer.getvalue()
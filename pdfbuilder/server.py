@@ -0,0 +1,206 @@
+"""Local HTTP render service.
+
+    python -m pdfbuilder serve --port 8080 --workers 4 --queue-size 16
+
+POST /render with a JSON document spec (the same fields as a batch job
+line) and the PDF comes back as the response body. Renders run in a
+pre-forked process pool that loads the font before forking; once every
+worker is busy and the queue is full, requests get 429 right away.
+Identical requests that arrive while one is rendering wait for it and
+are all sent its PDF. GET /healthz reports queue depth and coalescing;
+GET /metrics serves the Prometheus metrics of the whole service.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .artifacts import render_key
+from .batch import job_from_spec
+from .metrics import CONTENT_TYPE, default_metrics
+from .parallel import warm_worker
+from .render import write_pdf
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+def render_request(document, settings, submitted_at):
+    """Worker side: render into a temp file; returns (path, report, queue_wait, render_seconds)"""
+    started_at = time.time()
+    fd, path = tempfile.mkstemp(prefix="pdfbuilder-", suffix=".pdf")
+    os.close(fd)
+    try:
+        report = write_pdf(document, settings, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, report, started_at - submitted_at, time.time() - started_at
+
+
+class _Flight:
+    """One render in progress and the responses waiting on its file"""
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class RenderServer:
+    """asyncio HTTP front end over a bounded process pool"""
+
+    def __init__(self, defaults, workers=None, queue_size=16):
+        self.defaults = defaults
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_size
+        self.pending = 0
+        self.rejected = 0
+        self.renders = 0
+        self.coalesced = 0
+        self.flights = {}
+        self.pool = None
+        default_metrics.register_queue("server", self.queue_stats)
+
+    def queue_stats(self):
+        """Renders running in the pool and waiting for a worker"""
+        return {"running": min(self.pending, self.workers), "queued": max(0, self.pending - self.workers)}
+
+    def start_pool(self):
+        """Warm up here, then fork the workers so they inherit the parsed font and script table"""
+        warm_worker(self.defaults.font_path)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                        initializer=warm_worker, initargs=(self.defaults.font_path,))
+        # Start every worker now rather than on the first requests
+        for future in [self.pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    async def respond(self, writer, status, body=b"", content_type="application/json", headers=None):
+        head = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def respond_json(self, writer, status, payload, headers=None):
+        await self.respond(writer, status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    async def stream_file(self, writer, path, headers):
+        """Send a finished PDF in chunks, never holding the whole file in memory"""
+        size = os.path.getsize(path)
+        head = ["HTTP/1.1 200 OK", "Content-Type: application/pdf", f"Content-Length: {size}", "Connection: close"]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+                await writer.drain()
+
+    async def handle_render(self, writer, body):
+        try:
+            document, settings = job_from_spec(json.loads(body), self.defaults)
+        except (TypeError, ValueError) as e:
+            await self.respond_json(writer, 400, {"error": f"invalid document spec: {e!r}"})
+            return
+
+        key = render_key(document, settings)
+        flight = self.flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        elif self.pending >= self.capacity:
+            # Backpressure: refuse instead of queueing without bound
+            self.rejected += 1
+            await self.respond_json(writer, 429, {"error": "render queue is full"}, headers={"Retry-After": "1"})
+            return
+        else:
+            self.pending += 1
+            flight = self.flights[key] = _Flight(asyncio.ensure_future(self.run_render(document, settings)))
+            flight.future.add_done_callback(lambda _: self.flights.pop(key, None))
+            self.renders += 1
+
+        flight.waiters += 1
+        try:
+            path, report, queue_wait, render_seconds = await asyncio.shield(flight.future)
+        except Exception as e:
+            flight.waiters -= 1
+            await self.respond_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        try:
+            await self.stream_file(writer, path, {
+                "X-Queue-Wait-Ms": f"{queue_wait * 1000:.1f}",
+                "X-Render-Time-Ms": f"{render_seconds * 1000:.1f}",
+                "X-Page-Count": report.page_count,
+            })
+        finally:
+            # The last response sharing this render removes its file
+            flight.waiters -= 1
+            if not flight.waiters:
+                os.remove(path)
+
+    async def run_render(self, document, settings):
+        """Render in the pool; the caller has already counted it as pending"""
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.pool, render_request, document, settings, time.time())
+            # Renders run in the workers, so count them here where /metrics is served
+            default_metrics.observe_render(result[1])
+            return result
+        finally:
+            self.pending -= 1
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) != 3:
+                await self.respond_json(writer, 400, {"error": "malformed request line"})
+                return
+
+            method, target, _ = request_line
+            path = target.split("?", 1)[0]
+            if path == "/healthz":
+                await self.respond_json(writer, 200, {"pending": self.pending, "capacity": self.capacity,
+                                                      "workers": self.workers, "rejected": self.rejected,
+                                                      "renders": self.renders, "coalesced": self.coalesced})
+            elif path == "/metrics":
+                await self.respond(writer, 200, default_metrics.render_text().encode("utf-8"), CONTENT_TYPE)
+            elif path != "/render":
+                await self.respond_json(writer, 404, {"error": "not found"})
+            elif method != "POST":
+                await self.respond_json(writer, 405, {"error": "use POST"}, headers={"Allow": "POST"})
+            else:
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_BODY_BYTES:
+                    await self.respond_json(writer, 413, {"error": "request body too large"})
+                    return
+                await self.handle_render(writer, await reader.readexactly(length))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            await self.respond_json(writer, 400, {"error": "malformed request"})
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.start_pool()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port} with {self.workers} workers, queue of {self.capacity - self.workers}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
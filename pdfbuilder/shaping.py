@@ -0,0 +1,174 @@
+"""Arabic shaping (reshape + bidi reordering) with an LRU cache"""
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+
+import arabic_reshaper
+import numpy as np
+from bidi.algorithm import get_display
+
+# Paragraph scripts, from script_flags()
+SCRIPT_LTR = "ltr"
+SCRIPT_RTL = "rtl"
+SCRIPT_MIXED = "mixed"
+
+# Bits of script_flags()
+NEEDS_RESHAPE = 1  # Arabic letters, marks or ligature parts (or a joiner) for the reshaper
+RTL = 2  # Right-to-left letters or Arabic digits
+NEEDS_BIDI = 4  # Explicit bidi controls and characters get_display drops or rejects
+LTR = 8  # Left-to-right letters
+
+# Arabic blocks the reshaper acts on, plus the zero-width joiner it consumes
+_RESHAPE_RANGES = ((0x0600, 0x06FF), (0x0750, 0x077F), (0x0870, 0x08FF), (0xFB50, 0xFDFF),
+                   (0xFE70, 0xFEFF), (0x200D, 0x200D))
+_BIDI_CLASS_FLAGS = {'L': LTR, 'R': RTL, 'AL': RTL, 'AN': RTL}
+# Every other class (EN, ES, ET, CS, NSM, ON, WS, S, B) is left in place by a left-to-right paragraph
+_PASSIVE_CLASSES = {'EN', 'ES', 'ET', 'CS', 'NSM', 'ON', 'WS', 'S', 'B'}
+
+
+@lru_cache(maxsize=None)
+def _flag_table():
+    """Flags per BMP codepoint; the extra last slot stands for anything above it"""
+    table = np.zeros(0x10001, dtype=np.uint8)
+    for cp in range(0x10000):
+        direction = unicodedata.bidirectional(chr(cp))
+        if direction in _BIDI_CLASS_FLAGS:
+            table[cp] = _BIDI_CLASS_FLAGS[direction]
+        elif direction not in _PASSIVE_CLASSES:
+            table[cp] = NEEDS_BIDI
+    for start, stop in _RESHAPE_RANGES:
+        table[start:stop + 1] |= NEEDS_RESHAPE
+    # Not looked up outside the BMP; always take the full path
+    table[0x10000] = NEEDS_BIDI
+    return table
+
+
+def warm_script_table():
+    """Build the script flag table now rather than in the first render's "script" stage"""
+    _flag_table()
+
+
+def script_flags(text):
+    """OR of the flag bits of every character in text, from one vectorized table lookup"""
+    if text.isascii():
+        codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    else:
+        # Lone surrogates (valid in JSON input) have no bidi class and take the full path
+        codes = np.minimum(np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32), 0x10000)
+    return int(np.bitwise_or.reduce(_flag_table()[codes])) if len(codes) else 0
+
+
+def paragraph_script(flags):
+    """SCRIPT_LTR, SCRIPT_RTL or SCRIPT_MIXED for a paragraph's script_flags()"""
+    if not flags & RTL:
+        return SCRIPT_LTR
+    return SCRIPT_MIXED if flags & LTR else SCRIPT_RTL
+
+
+def paragraph_direction(text):
+    """Base direction of a paragraph from its first strong character: 'R' or 'L'"""
+    for ch in text:
+        direction = unicodedata.bidirectional(ch)
+        if direction in ('R', 'AL'):
+            return 'R'
+        if direction == 'L':
+            return 'L'
+    return 'L'
+
+
+class ShapingCache:
+    """Bounded LRU cache of reshaped paragraphs and reordered lines.
+
+    Paragraphs are reshaped in logical order and cached by text; bidi
+    reordering is applied to each finished line and cached by line text
+    plus base direction. A render after a small edit only reshapes the
+    paragraphs (and reorders the lines) that changed. Paragraphs with
+    nothing to reshape or reorder skip the cache altogether; count_skipped()
+    records them per script.
+
+    Both the entry count and the characters held (input plus result) are
+    bounded: past maxsize entries or max_chars characters the least recently
+    used entries go, and a text over max_item_chars is shaped but not cached,
+    so one huge paragraph is not kept twice.
+    """
+
+    def __init__(self, maxsize=16384, max_chars=32 * 1024 * 1024, max_item_chars=1024 * 1024):
+        self.maxsize = maxsize
+        self.max_chars = max_chars
+        self.max_item_chars = max_item_chars
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.scripts = dict.fromkeys((SCRIPT_LTR, SCRIPT_RTL, SCRIPT_MIXED), 0)
+        self.reshapes_skipped = 0
+        self.reshape_chars_skipped = 0
+        self.displays_skipped = 0
+
+    def _cached(self, key, compute):
+        if len(key[1]) > self.max_item_chars:
+            with self._lock:
+                self.misses += 1
+            return compute()
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Compute outside the lock so other sessions are not serialized on it
+        value = compute()
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.chars -= len(key[1]) + len(old)
+            self._entries[key] = value
+            self.chars += len(key[1]) + len(value)
+            while len(self._entries) > self.maxsize or self.chars > self.max_chars:
+                (_, text, *_), evicted = self._entries.popitem(last=False)
+                self.chars -= len(text) + len(evicted)
+        return value
+
+    def reshape(self, paragraph):
+        """Join Arabic letters in a paragraph; the result stays in logical order"""
+        return self._cached(('reshape', paragraph), lambda: arabic_reshaper.reshape(paragraph))
+
+    def display(self, line, base_dir=None):
+        """Reorder one finished line from logical to visual order"""
+        return self._cached(('display', line, base_dir), lambda: get_display(line, base_dir=base_dir))
+
+    def count_skipped(self, script, reshape_chars=0, displays=0):
+        """Record one paragraph of a script and the reshape characters and line reorders it skipped"""
+        with self._lock:
+            self.scripts[script] += 1
+            self.reshapes_skipped += bool(reshape_chars)
+            self.reshape_chars_skipped += reshape_chars
+            self.displays_skipped += displays
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.chars = 0
+            self.hits = 0
+            self.misses = 0
+            self.scripts = dict.fromkeys(self.scripts, 0)
+            self.reshapes_skipped = 0
+            self.reshape_chars_skipped = 0
+            self.displays_skipped = 0
+
+    def stats(self):
+        """Return hit/miss counters, current size and the work the script fast path skipped"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize,
+                "chars": self.chars, "max_chars": self.max_chars,
+                "paragraphs": dict(self.scripts), "reshapes_skipped": self.reshapes_skipped,
+                "reshape_chars_skipped": self.reshape_chars_skipped, "displays_skipped": self.displays_skipped}
+
+
+# Shared by every session in this process
+default_shaping_cache = ShapingCache()
@@ -0,0 +1,66 @@
+"""Collapse concurrent identical calls into one"""
+import threading
+from concurrent.futures import Future, TimeoutError
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result.
+
+    Only calls that overlap are coalesced: once the leading call returns,
+    the next call with the same key runs again (pair it with a cache).
+    """
+
+    def __init__(self, poll_interval=0.2):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, poll=None):
+        """Return (fn(), shared), where shared means another caller's result was reused.
+
+        While waiting on another caller, poll (if given) is called every
+        poll_interval seconds and may raise to stop waiting.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result, False
+            finally:
+                with self._lock:
+                    del self._calls[key]
+
+        while True:
+            try:
+                return future.result(timeout=self.poll_interval if poll else None), True
+            except TimeoutError:
+                poll()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """Return leader/coalesced counters and the share of calls that were coalesced"""
+        calls = self.leaders + self.coalesced
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+            "coalesced_rate": self.coalesced / calls if calls else 0.0,
+        }
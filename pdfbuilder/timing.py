@@ -0,0 +1,65 @@
+"""Per-stage timing for renders, and the structured render log"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+RENDER_LOG_ENV = "PDFBUILDER_RENDER_LOG"
+
+# One JSON record per finished render
+render_logger = logging.getLogger("pdfbuilder.render")
+
+
+class StageTimer:
+    """Accumulates wall-clock and CPU seconds per named stage.
+
+    CPU time is the calling thread's, so renders running side by side on
+    worker threads do not count each other's work.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.cpu = {}
+
+    @contextmanager
+    def stage(self, name):
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self.cpu[name] = self.cpu.get(name, 0.0) + time.thread_time() - cpu_start
+
+
+def log_render(report, **fields):
+    """Write one structured record for a finished render to the render logger"""
+    if not render_logger.isEnabledFor(logging.INFO):
+        return
+    record = {
+        "event": "render",
+        "time": time.time(),
+        "page_count": report.page_count,
+        "line_count": report.line_count,
+        "byte_count": report.byte_count,
+        "wall_seconds": report.timings,
+        "cpu_seconds": report.cpu_timings,
+        **fields,
+    }
+    render_logger.info(json.dumps(record, ensure_ascii=False), extra={"render": record})
+
+
+def configure_render_log(path=None):
+    """Send render records as JSON lines to path (default $PDFBUILDER_RENDER_LOG, '-' for stderr).
+
+    Does nothing when no path is set, or when the logger already has handlers.
+    """
+    path = path or os.environ.get(RENDER_LOG_ENV)
+    if not path or render_logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr) if path == "-" else logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    render_logger.addHandler(handler)
+    render_logger.setLevel(logging.INFO)
+    render_logger.propagate = False
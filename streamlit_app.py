@@ -1,6 +1,7 @@
-import streamlit as st
-from io import BytesIO
 import os
+from functools import partial
+
+import streamlit as st
 
 # Page setup
 st.set_page_config(page_title="Arabic PDF Builder", layout="centered")
@@ -10,14 +11,21 @@ st.markdown("Create beautiful PDFs with Arabic text and decorative borders")
 
 # Check for required packages
 try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import simpleSplit
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.pdfbase import pdfmetrics
-    import arabic_reshaper
-    from bidi.algorithm import get_display
-    import requests
+    from pdfbuilder import (
+        ALIGNMENTS,
+        NOTO_NASKH_ARABIC,
+        ArtifactCache,
+        BackgroundRenderer,
+        Document,
+        FontAssetStore,
+        LayoutSession,
+        PDFSettings,
+        configure_render_log,
+        default_metrics,
+        load_font,
+        start_metrics_exporter,
+        warm_worker,
+    )
     DEPENDENCIES_INSTALLED = True
 except ImportError as e:
     DEPENDENCIES_INSTALLED = False
@@ -33,6 +41,7 @@ except ImportError as e:
     arabic-reshaper
     python-bidi
     requests
+    numpy
     ```
     
     ### For Streamlit Cloud:
@@ -43,33 +52,49 @@ except ImportError as e:
     
     ### For Local Development:
     ```bash
-    pip install reportlab arabic-reshaper python-bidi requests
+    pip install reportlab arabic-reshaper python-bidi requests numpy
     ```
     
     Then restart your Streamlit app.
     """)
     st.stop()
 
-# Download Arabic font if not exists
+# Structured render records go to $PDFBUILDER_RENDER_LOG when it is set
+configure_render_log()
+
+# Prometheus metrics on $PDFBUILDER_METRICS_PORT and/or $PDFBUILDER_METRICS_TEXTFILE
+start_metrics_exporter()
+
+# Locate the Arabic font (local cache or mirror first, network only once)
 @st.cache_resource
-def download_arabic_font():
-    """Download Arabic font for PDF generation"""
-    font_path = "NotoNaskhArabic-Regular.ttf"
-    
-    if not os.path.exists(font_path):
-        try:
-            # Download Noto Naskh Arabic font from Google Fonts
-            url = "https://github.com/google/fonts/raw/main/ofl/notonaskharabic/NotoNaskhArabic%5Bwght%5D.ttf"
-            response = requests.get(url)
-            with open(font_path, 'wb') as f:
-                f.write(response.content)
-            return font_path
-        except:
-            return None
-    return font_path
+def get_arabic_font_path():
+    """Return a verified local copy of the Arabic font, or None"""
+    return FontAssetStore().fetch(NOTO_NASKH_ARABIC)
 
 # Load the font
-arabic_font_path = download_arabic_font()
+arabic_font_path = get_arabic_font_path()
+
+
+# Parse the font and build the script table once per process, not in the first render
+@st.cache_resource
+def warm_up(font_path):
+    warm_worker(font_path)
+
+warm_up(arabic_font_path)
+
+
+# Rendered PDFs, shared by every session
+@st.cache_resource
+def get_pdf_cache():
+    """Return the process-wide cache of rendered PDFs"""
+    cache = ArtifactCache()
+    default_metrics.register_cache("artifact", cache.stats)
+    return cache
+
+def read_pdf(path):
+    """Contents of a rendered PDF, for the download button"""
+    with open(path, "rb") as f:
+        return f.read()
 
 # Sidebar for options
 st.sidebar.header("⚙️ PDF Settings")
@@ -135,43 +160,44 @@ margin_right = st.sidebar.number_input("Right Margin (mm):", min_value=15, max_v
 # Text alignment
 text_align = st.sidebar.selectbox(
     "Text Alignment:",
-    ["Right (Arabic)", "Center", "Justify"],
+    ALIGNMENTS,
     help="Choose text alignment"
 )
 
 
-def mm_to_points(mm):
-    """Convert millimeters to points"""
-    return mm * 2.83465
+# Background renders, shared by every session
+@st.cache_resource
+def get_renderer():
+    """Return the process-wide background renderer"""
+    renderer = BackgroundRenderer()
+    default_metrics.register_queue("app", renderer.stats)
+    return renderer
 
 
-def draw_decorative_border(c, width, height):
-    """Draw decorative corner borders on the page"""
-    c.setStrokeColorRGB(0.72, 0.53, 0.04)  # Golden color
-    c.setLineWidth(2)
-    
-    # Top right corner decoration
-    corner_size = 60
-    
-    # Top right ornamental corner
-    c.circle(width - 30, height - 30, 8, stroke=1, fill=0)
-    c.circle(width - 45, height - 20, 5, stroke=1, fill=0)
-    c.circle(width - 20, height - 45, 5, stroke=1, fill=0)
-    c.line(width - 30, height - 30, width - 30, height - corner_size)
-    c.line(width - 30, height - 30, width - corner_size, height - 30)
-    
-    # Bottom left corner decoration
-    c.setStrokeColorRGB(0.0, 0.6, 0.8)  # Blue color
-    c.circle(30, 30, 8, stroke=1, fill=0)
-    c.circle(45, 40, 5, stroke=1, fill=0)
-    c.circle(40, 45, 5, stroke=1, fill=0)
-    c.line(30, 30, 30, corner_size + 30)
-    c.line(30, 30, corner_size + 30, 30)
-    c.circle(25, 50, 3, stroke=1, fill=0)
-    c.circle(50, 25, 3, stroke=1, fill=0)
-    
-    # Horizontal line at bottom
-    c.line(corner_size + 40, 30, width - 30, 30)
+@st.fragment(run_every=0.5)
+def show_render_progress(job):
+    """Poll the running render without blocking the script; rerun the page once it finishes"""
+    if job.done():
+        st.rerun()
+    progress = job.progress
+    if job.position:
+        fraction = 0.0
+        status = f"Waiting for a free renderer: you are number {job.position} in the queue"
+    elif progress.stage == "saving":
+        fraction = 1.0
+        status = f"Writing the PDF ({progress.total_pages} pages)..."
+    elif progress.pages_drawn:
+        # Pages are laid out and drawn as a stream, so the total is only known at the end
+        estimate = max(job.estimated_pages, progress.pages_drawn + 1)
+        fraction = progress.pages_drawn / estimate
+        status = f"{progress.pages_laid_out} pages laid out, {progress.pages_drawn} drawn"
+    else:
+        fraction = 0.0
+        status = "Laying out text..."
+    st.progress(min(fraction, 1.0), text=status)
+    if st.button("✖️ Cancel", use_container_width=True):
+        job.cancel()
+        st.rerun()
 
 
 # Generate PDF button
@@ -179,207 +205,105 @@ if st.button("🎨 Generate PDF", type="primary", use_container_width=True):
     if not arabic_text.strip():
         st.error("⚠️ Please enter some body text first!")
     else:
-        with st.spinner("Creating your PDF..."):
-            try:
-                # Create PDF directly here
-                buffer = BytesIO()
-                
-                # Create PDF canvas
-                page_width, page_height = A4
-                c = canvas.Canvas(buffer, pagesize=A4)
-                
-                # Register Arabic font
-                try:
-                    if arabic_font_path and os.path.exists(arabic_font_path):
-                        pdfmetrics.registerFont(TTFont('Arabic', arabic_font_path))
-                        font_name = 'Arabic'
-                    else:
-                        font_name = 'Helvetica'
-                        st.warning("⚠️ Arabic font not available, using fallback.")
-                except Exception as e:
-                    font_name = 'Helvetica'
-                    st.warning(f"⚠️ Could not load Arabic font: {e}")
-                
-                # Convert margins to points
-                margin_top_pt = mm_to_points(margin_top)
-                margin_bottom_pt = mm_to_points(margin_bottom)
-                margin_left_pt = mm_to_points(margin_left)
-                margin_right_pt = mm_to_points(margin_right)
-                
-                # Calculate text area
-                text_width = page_width - margin_left_pt - margin_right_pt
-                text_height = page_height - margin_top_pt - margin_bottom_pt
-                
-                # Process title if provided
-                title_lines = []
-                title_height = 0
-                if title_text and title_text.strip():
-                    reshaped_title = arabic_reshaper.reshape(title_text)
-                    bidi_title = get_display(reshaped_title)
-                    
-                    # Split title into lines if too long
-                    title_lines = simpleSplit(bidi_title, font_name, title_font_size, text_width)
-                    title_line_height = title_font_size * 1.5
-                    title_height = len(title_lines) * title_line_height + 20  # Add spacing after title
-                
-                # Adjust text area for title on first page
-                first_page_text_height = text_height - title_height
-                
-                # Process body text
-                reshaped_text = arabic_reshaper.reshape(arabic_text)
-                bidi_text = get_display(reshaped_text)
-                
-                # Split text into lines that fit the width
-                lines = []
-                paragraphs = bidi_text.split('\n')
-                
-                for paragraph in paragraphs:
-                    if paragraph.strip():
-                        wrapped_lines = simpleSplit(paragraph, font_name, font_size, text_width)
-                        lines.extend(wrapped_lines)
-                    else:
-                        lines.append('')  # Empty line for paragraph breaks
-                
-                # Calculate line height
-                line_height = font_size * line_spacing
-                
-                # Paginate - first page has less space due to title
-                lines_on_first_page = int(first_page_text_height / line_height) if first_page_text_height > 0 else 0
-                lines_per_page = int(text_height / line_height)
-                
-                page_number = 1
-                line_index = 0
-                
-                while line_index < len(lines):
-                    if page_number > 1:
-                        c.showPage()
-                    
-                    # Draw decorative borders
-                    draw_decorative_border(c, page_width, page_height)
-                    
-                    # Draw title on first page only
-                    y_position = page_height - margin_top_pt
-                    if page_number == 1 and title_lines:
-                        # Set title font
-                        c.setFont(font_name, title_font_size)
-                        
-                        # Draw title lines
-                        for title_line in title_lines:
-                            # Center align title
-                            x_position = page_width / 2
-                            c.drawCentredString(x_position, y_position, title_line)
-                            y_position -= title_font_size * 1.5
-                        
-                        # Add spacing after title
-                        y_position -= 20
-                    
-                    # Set body font
-                    c.setFont(font_name, font_size)
-                    
-                    # Determine how many lines for this page
-                    if page_number == 1:
-                        lines_this_page = min(lines_on_first_page, len(lines) - line_index)
-                    else:
-                        lines_this_page = min(lines_per_page, len(lines) - line_index)
-                    
-                    # Get lines for this page
-                    page_lines = lines[line_index:line_index + lines_this_page]
-                    
-                    # Draw body text
-                    for i, line in enumerate(page_lines):
-                        if line.strip():
-                            # Calculate x position based on alignment
-                            if text_align == "Right (Arabic)":
-                                x_position = page_width - margin_right_pt
-                                c.drawRightString(x_position, y_position, line)
-                            elif text_align == "Center":
-                                x_position = page_width / 2
-                                c.drawCentredString(x_position, y_position, line)
-                            else:  # Justify - use text object for proper justification
-                                # Check if this is the last line of a paragraph
-                                is_last_line = (i == len(page_lines) - 1) or (i + 1 < len(page_lines) and not page_lines[i + 1].strip())
-                                
-                                if is_last_line:
-                                    # Last line - right align
-                                    x_position = page_width - margin_right_pt
-                                    c.drawRightString(x_position, y_position, line)
-                                else:
-                                    # Justify the line
-                                    line_width = c.stringWidth(line, font_name, font_size)
-                                    space_count = line.count(' ')
-                                    
-                                    # Only justify if line is substantial and has spaces
-                                    if space_count > 0 and line_width > (text_width * 0.5):
-                                        space_needed = text_width - line_width
-                                        extra_space = space_needed / space_count
-                                        
-                                        # Limit stretching
-                                        if extra_space < font_size * 1.0:
-                                            # Use text object with word spacing for perfect justification
-                                            text_obj = c.beginText()
-                                            text_obj.setTextOrigin(page_width - margin_right_pt - text_width, y_position)
-                                            text_obj.setFont(font_name, font_size)
-                                            text_obj.setWordSpace(c.stringWidth(' ', font_name, font_size) + extra_space)
-                                            text_obj.textLine(line)
-                                            c.drawText(text_obj)
-                                        else:
-                                            # Too much stretch - right align
-                                            x_position = page_width - margin_right_pt
-                                            c.drawRightString(x_position, y_position, line)
-                                    else:
-                                        # Short line - right align
-                                        x_position = page_width - margin_right_pt
-                                        c.drawRightString(x_position, y_position, line)
-                        
-                        y_position -= line_height
-                    
-                    # Add page number
-                    c.setFont(font_name, 10)
-                    
-                    # Calculate total pages
-                    remaining_lines = len(lines) - lines_on_first_page
-                    if remaining_lines > 0:
-                        total_pages = 1 + ((remaining_lines + lines_per_page - 1) // lines_per_page)
-                    else:
-                        total_pages = 1
-                    
-                    page_text = f"Page {page_number} of {total_pages}"
-                    c.drawCentredString(page_width / 2, 15, page_text)
-                    
-                    line_index += lines_this_page
-                    page_number += 1
-                
-                # Save PDF
-                c.save()
-                buffer.seek(0)
-                
-                st.success("✅ PDF created successfully!")
-                
-                # Preview info
-                info_text = f"""
-                **PDF Details:**
-                - Title: {'Yes' if title_text else 'No title'}
-                - Title Font Size: {title_font_size}pt
-                - Body Font Size: {font_size}pt
-                - Line Spacing: {line_spacing}
-                - Alignment: {text_align}
-                - Margins: T:{margin_top}mm, B:{margin_bottom}mm, L:{margin_left}mm, R:{margin_right}mm
-                """
-                st.info(info_text)
-                
-                # Download button
-                st.download_button(
-                    label="📥 Download PDF",
-                    data=buffer,
-                    file_name="arabic_document.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-                
-            except Exception as e:
-                st.error(f"❌ Error creating PDF: {str(e)}")
-                import traceback
-                st.code(traceback.format_exc())
+        document = Document(body=arabic_text, title=title_text)
+        settings = PDFSettings(
+            title_font_size=title_font_size,
+            title_bold=title_bold,
+            font_size=font_size,
+            line_spacing=line_spacing,
+            margin_top=margin_top,
+            margin_bottom=margin_bottom,
+            margin_left=margin_left,
+            margin_right=margin_right,
+            text_align=text_align,
+            font_path=arabic_font_path,
+        )
+        
+        # Register Arabic font
+        _, font_warning = load_font(settings.font_path)
+        
+        # A new render replaces this session's previous one
+        previous_job = st.session_state.get("render_job")
+        if previous_job and not previous_job.done():
+            previous_job.cancel()
+        
+        # Reuse an identical earlier render, or write a new one into the cache,
+        # re-wrapping only the paragraphs edited since this session's last render
+        layout_session = st.session_state.setdefault("layout_session", LayoutSession())
+        render = partial(get_pdf_cache().render, layout_session=layout_session)
+        st.session_state["render_job"] = get_renderer().submit(render, document, settings)
+        # Kept on the job so it is still shown when the result arrives on a later rerun
+        st.session_state["render_job"].warning = font_warning
+
+render_job = st.session_state.get("render_job")
+if render_job and render_job.warning:
+    st.warning(f"⚠️ {render_job.warning}")
+if render_job and not render_job.done():
+    show_render_progress(render_job)
+elif render_job and render_job.cancelled():
+    st.info("PDF generation was cancelled.")
+elif render_job and render_job.exception():
+    st.error(f"❌ Error creating PDF: {str(render_job.exception())}")
+    if render_job.traceback:
+        st.code(render_job.traceback)
+elif render_job:
+    pdf_path, report, cache_hit = render_job.result()
+    settings = render_job.settings
+    
+    st.success("✅ PDF created successfully!")
+    
+    # Preview info
+    info_text = f"""
+    **PDF Details:**
+    - Title: {'Yes' if render_job.document.title else 'No title'}
+    - Title Font Size: {settings.title_font_size}pt
+    - Body Font Size: {settings.font_size}pt
+    - Line Spacing: {settings.line_spacing}
+    - Alignment: {settings.text_align}
+    - Pages: {report.page_count} ({report.byte_count / 1024:.0f} KB)
+    - Margins: T:{settings.margin_top}mm, B:{settings.margin_bottom}mm, L:{settings.margin_left}mm, R:{settings.margin_right}mm
+    """
+    st.info(info_text)
+    
+    # Where the render time went
+    with st.expander("⏱️ Render Timings"):
+        if cache_hit:
+            st.caption("Served from the PDF cache; timings are from the original render.")
+        st.table([
+            {
+                "Stage": stage,
+                "Wall (ms)": f"{seconds * 1000:.1f}",
+                "CPU (ms)": f"{report.cpu_timings.get(stage, 0.0) * 1000:.1f}",
+            }
+            for stage, seconds in report.timings.items()
+        ])
+        st.markdown(
+            f"**Lines:** {report.line_count} · **Pages:** {report.page_count} · "
+            f"**Bytes:** {report.byte_count:,} · **Total:** {sum(report.timings.values()) * 1000:.0f} ms"
+        )
+        layout_stats = report.layout_stats
+        if layout_stats and layout_stats["paragraphs_reused"]:
+            st.caption(
+                f"Re-wrapped {layout_stats['paragraphs_reflowed']} of {layout_stats['paragraphs']} paragraphs; "
+                f"{layout_stats['pages_reflowed']} of {layout_stats['pages']} pages changed."
+            )
+        if report.pages_reused:
+            st.caption(f"Reused {report.pages_reused} of {report.page_count} drawn pages from earlier renders.")
+    
+    # Download button, read from the file on disk only when clicked; passing
+    # the file itself would copy it into memory again on every rerun
+    if not os.path.exists(pdf_path):
+        # The shared PDF cache evicted or expired this file since it was rendered
+        del st.session_state["render_job"]
+        st.warning("⚠️ This PDF is no longer cached. Click Generate PDF to render it again.")
+    else:
+        st.download_button(
+            label="📥 Download PDF",
+            data=partial(read_pdf, pdf_path),
+            file_name="arabic_document.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+import reportlab
+from reportlab import rl_config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdfbuilder import load_font  # noqa: E402
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+@pytest.fixture(autouse=True)
+def invariant_pdfs(monkeypatch):
+    """No timestamps or random IDs in the PDFs, so renders compare byte for byte"""
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+@pytest.fixture(scope="session")
+def font_path():
+    return VERA
+
+
+@pytest.fixture(scope="session")
+def font_name(font_path):
+    name, warning = load_font(font_path)
+    assert warning is None
+    return name
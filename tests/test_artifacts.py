@@ -0,0 +1,81 @@
+"""On-disk PDF cache: TTL expiry, LRU eviction and the running size total"""
+import os
+import time
+
+import pytest
+
+from pdfbuilder import ArtifactCache, Document, PDFSettings, render_key
+
+
+@pytest.fixture
+def settings(font_path):
+    return PDFSettings(font_path=font_path)
+
+
+def document(n):
+    return Document(body=f"نص المستند رقم {n} " * 20)
+
+
+def pdf_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(directory) for name in files if name.endswith(".pdf"))
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path, settings):
+    cache = ArtifactCache(str(tmp_path), ttl_seconds=60)
+    pdf_path, _, hit = cache.render(document(1), settings)
+    assert not hit and cache.render(document(1), settings)[2]
+
+    old = time.time() - 120
+    os.utime(pdf_path, (old, old))
+    assert cache.get(render_key(document(1), settings)) is None
+    assert not os.path.exists(pdf_path)
+
+
+def test_least_recently_read_entries_are_evicted_but_keep_survives(tmp_path, settings):
+    cache = ArtifactCache(str(tmp_path), scan_writes=1000, scan_interval=3600)
+    paths = [cache.render(document(n), settings)[0] for n in range(4)]
+    keys = [render_key(document(n), settings) for n in range(4)]
+    # Read order, oldest first: 0, 1, 2, 3; mtimes stay fresh for the TTL
+    now = time.time()
+    for age, path in zip((400, 300, 200, 100), paths):
+        os.utime(path, (now - age, now))
+
+    sizes = [os.path.getsize(path) for path in paths]
+    cache.max_bytes = sum(sizes[2:]) + 1
+    cache.evict(keep=keys[0])
+    # Entry 0 is the oldest but kept; 1 and 2 go until the total fits; 3 is the newest
+    assert [os.path.exists(path) for path in paths] == [True, False, False, True]
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["bytes"] == pdf_bytes(tmp_path)
+
+
+def test_running_total_tracks_writes_without_rescanning(tmp_path, settings, monkeypatch):
+    cache = ArtifactCache(str(tmp_path), scan_writes=1000, scan_interval=3600)
+    walks = []
+    walk = os.walk
+    monkeypatch.setattr(os, "walk", lambda *args, **kwargs: walks.append(args) or walk(*args, **kwargs))
+
+    for n in range(5):
+        cache.render(document(n), settings)
+    # Only the first write scans; the rest add to the total
+    assert len(walks) == 1
+    monkeypatch.undo()
+    assert cache.stats()["bytes"] == pdf_bytes(tmp_path)
+
+
+def test_scan_runs_every_scan_writes_and_over_max_bytes(tmp_path, settings, monkeypatch):
+    cache = ArtifactCache(str(tmp_path), scan_writes=3, scan_interval=3600)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda keep=None: scans.append(keep) or evict(keep))
+
+    for n in range(7):
+        cache.render(document(n), settings)
+    assert len(scans) == 3  # first write, then every third
+
+    cache.max_bytes = pdf_bytes(tmp_path)
+    path, _, _ = cache.render(document(7), settings)
+    assert len(scans) == 4
+    assert os.path.exists(path)
+    assert pdf_bytes(tmp_path) <= cache.max_bytes
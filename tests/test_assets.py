@@ -0,0 +1,122 @@
+"""Font asset store: every source is verified before it is used"""
+import hashlib
+import os
+
+import pytest
+import reportlab
+import requests
+
+from pdfbuilder import FontAsset, FontAssetStore
+
+with open(os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf"), "rb") as f:
+    FONT = f.read()
+DIGEST = hashlib.sha256(FONT).hexdigest()
+
+
+class Response:
+    """Stand-in for a streamed requests response"""
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = {"Content-Length": str(len(body))} if headers is None else headers
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Stub requests.get: set server.response; server.calls counts requests"""
+    class Server:
+        response = Response(FONT)
+        calls = 0
+
+    def get(url, timeout, stream):
+        Server.calls += 1
+        return Server.response
+
+    monkeypatch.setattr(requests, "get", get)
+    return Server
+
+
+def store(tmp_path, **kwargs):
+    kwargs.setdefault("mirrors", [])
+    kwargs.setdefault("offline", False)
+    return FontAssetStore(cache_dir=str(tmp_path / "cache"), **kwargs)
+
+
+def cache_files(tmp_path):
+    return sorted(os.listdir(tmp_path / "cache")) if (tmp_path / "cache").exists() else []
+
+
+ASSET = FontAsset(filename="Test.ttf", url="https://fonts.invalid/Test.ttf")
+
+
+def test_download_is_stored_by_digest_then_served_from_cache(tmp_path, server):
+    fonts = store(tmp_path)
+    path = fonts.fetch(ASSET)
+    assert path.endswith(f"{DIGEST}.ttf")
+    with open(path, "rb") as f:
+        assert f.read() == FONT
+    assert fonts.fetch(ASSET) == path
+    assert server.calls == 1
+    assert fonts.stats()["sources"] == {"cache": 1, "mirror": 0, "download": 1}
+
+
+@pytest.mark.parametrize("response", [
+    Response(FONT[:1000], headers={"Content-Length": str(len(FONT))}),
+    Response(b"<html>rate limited</html>"),
+], ids=["truncated", "not-a-font"])
+def test_bad_download_is_rejected(tmp_path, server, response):
+    server.response = response
+    fonts = store(tmp_path)
+    assert fonts.fetch(ASSET) is None
+    assert cache_files(tmp_path) == []
+
+
+def test_pinned_digest_mismatch_is_rejected(tmp_path, server):
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    (mirror / ASSET.filename).write_bytes(FONT)
+    pinned = FontAsset(filename=ASSET.filename, url=ASSET.url, sha256="0" * 64)
+    fonts = store(tmp_path, mirrors=[str(mirror)])
+    assert fonts.fetch(pinned) is None
+    assert server.calls == 1
+    assert cache_files(tmp_path) == []
+
+    matching = FontAsset(filename=ASSET.filename, url=ASSET.url, sha256=DIGEST.upper())
+    assert fonts.fetch(matching)
+    assert fonts.stats()["sources"]["mirror"] == 1
+
+
+def test_corrupted_cache_blob_is_verified_again(tmp_path, server):
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    (mirror / ASSET.filename).write_bytes(FONT)
+    path = store(tmp_path, mirrors=[str(mirror)]).fetch(ASSET)
+    with open(path, "r+b") as f:
+        f.write(b"\0\1\0\0garbage")
+
+    # A new process hashes the blob before trusting it and restores it from the mirror
+    fonts = store(tmp_path, mirrors=[str(mirror)])
+    assert fonts.fetch(ASSET) == path
+    with open(path, "rb") as f:
+        assert f.read() == FONT
+    assert fonts.stats()["sources"] == {"cache": 0, "mirror": 1, "download": 0}
+    assert server.calls == 0
+
+
+def test_offline_without_cache_or_mirror_returns_none(tmp_path, server):
+    fonts = store(tmp_path, offline=True)
+    assert fonts.fetch(ASSET) is None
+    assert server.calls == 0
+
+
+def test_download_past_its_deadline_is_abandoned(tmp_path, server):
+    fonts = store(tmp_path, download_timeout=-1)
+    assert fonts.fetch(ASSET) is None
+    assert cache_files(tmp_path) == []
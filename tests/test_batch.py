@@ -0,0 +1,61 @@
+"""JSONL batch jobs: bad lines become error records and the rest still render"""
+import io
+import json
+
+import pytest
+
+from pdfbuilder import PDFSettings
+from pdfbuilder.batch import job_from_spec, run_batch
+
+
+@pytest.fixture
+def defaults(font_path):
+    return PDFSettings(font_path=font_path)
+
+
+def batch(tmp_path, defaults, specs):
+    lines = [spec if isinstance(spec, str) else json.dumps(spec, ensure_ascii=False) for spec in specs]
+    results = io.StringIO()
+    ok, failed = run_batch(lines, str(tmp_path), results, defaults)
+    records = sorted((json.loads(line) for line in results.getvalue().splitlines()), key=lambda r: r["line"])
+    return ok, failed, records
+
+
+@pytest.mark.parametrize("spec, error", [
+    ([1, 2], ValueError),
+    ({"title": "no body"}, ValueError),
+    ({"body": 42}, ValueError),
+    ({"body": " \n "}, ValueError),
+    ({"body": "text", "title": ["x"]}, ValueError),
+    ({"body": "text", "margins": [35]}, ValueError),
+    ({"body": "text", "margins": "x"}, ValueError),
+    ({"body": "text", "margins": {"middle": 10}}, TypeError),
+    ({"body": "text", "text_align": "Sideways"}, ValueError),
+])
+def test_job_from_spec_rejects_malformed_specs(spec, error, defaults):
+    with pytest.raises(error):
+        job_from_spec(spec, defaults)
+
+
+def test_bad_lines_do_not_stop_the_batch(tmp_path, defaults):
+    ok, failed, records = batch(tmp_path, defaults, [
+        {"id": "a", "body": "نص أول"},
+        {"id": "b", "body": "text", "margins": [35]},
+        "not json",
+        {"id": "c", "body": 7},
+        {"id": "d", "body": "نص أخير", "margins": {"top": 20}},
+    ])
+    assert (ok, failed) == (2, 3)
+    assert [r["id"] for r in records if not r["error"]] == ["a", "d"]
+    assert all(r["error"].startswith("invalid job") for r in records if r["error"])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf", "d.pdf"]
+
+
+def test_duplicate_ids_are_reported_not_overwritten(tmp_path, defaults):
+    ok, failed, records = batch(tmp_path, defaults, [
+        {"id": "same", "body": "first"},
+        {"id": "same", "body": "second"},
+    ])
+    assert (ok, failed) == (1, 1)
+    assert records[0]["output"].endswith("same.pdf") and not records[0]["error"]
+    assert "line 1" in records[1]["error"]
@@ -0,0 +1,26 @@
+"""CLI render: output paths follow the input layout and never collide"""
+from pdfbuilder.cli import main
+
+
+def write(path, text="نص المستند"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_recursive_glob_keeps_subdirectories(tmp_path, font_path):
+    write(tmp_path / "in" / "a" / "letter.txt")
+    write(tmp_path / "in" / "b" / "letter.txt")
+    out = tmp_path / "out"
+    assert main(["render", str(tmp_path / "in" / "**" / "*.txt"), "-o", str(out), "--jobs", "1",
+                 "--font", font_path]) == 0
+    assert sorted(str(p.relative_to(out)) for p in out.rglob("*.pdf")) == ["a/letter.pdf", "b/letter.pdf"]
+
+
+def test_same_name_in_two_directories_is_rejected(tmp_path, font_path, capsys):
+    write(tmp_path / "one" / "letter.txt")
+    write(tmp_path / "two" / "letter.txt")
+    out = tmp_path / "out"
+    assert main(["render", str(tmp_path / "one"), str(tmp_path / "two"), "-o", str(out),
+                 "--font", font_path]) == 1
+    assert "would both be written to" in capsys.readouterr().err
+    assert not out.exists()
@@ -0,0 +1,139 @@
+"""The fast paths produce exactly what the plain ones do, on small corpora"""
+from io import BytesIO
+
+import arabic_reshaper
+import pytest
+from bidi.algorithm import get_display
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from benchmarks.corpora import make_corpus
+from pdfbuilder import ALIGNMENTS, Document, LayoutSession, PageContentCache, PDFSettings, write_pdf
+from pdfbuilder.layout import layout_document, page_geometry, wrap_paragraph, wrap_text
+from pdfbuilder.linebreak import WordWidthCache, break_lines
+from pdfbuilder.parallel import ShapingPool
+from pdfbuilder.render import render_layout, stamp_footers
+from pdfbuilder.shaping import ShapingCache, paragraph_direction
+
+FONT_SIZE = 14
+WIDTH = page_geometry(PDFSettings()).text_width
+SHAPES = ("long_paragraphs", "short_lines", "mixed", "diacritics", "bilingual")
+
+
+def render(document, settings, **kwargs):
+    buffer = BytesIO()
+    report = write_pdf(document, settings, buffer, **kwargs)
+    return buffer.getvalue(), report
+
+
+def edits(body):
+    """Edited versions of body: a word changed, a paragraph added, one removed, the last one changed"""
+    paragraphs = body.split('\n')
+    middle = len(paragraphs) // 2
+    changed = list(paragraphs)
+    changed[middle] = changed[middle].replace(' ', ' تعديل ', 1)
+    yield '\n'.join(changed)
+    yield '\n'.join(paragraphs[:middle] + ["فقرة جديدة مضافة في الوسط " * 12] + paragraphs[middle:])
+    yield '\n'.join(paragraphs[:middle] + paragraphs[middle + 1:])
+    yield '\n'.join(paragraphs[:-1] + [paragraphs[-1] + " and an English ending"])
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_break_lines_matches_simple_split(shape, font_name):
+    cache = WordWidthCache()
+    space = stringWidth(' ', font_name, FONT_SIZE)
+    for paragraph in make_corpus(shape, 16 * 1024).split('\n'):
+        reshaped = arabic_reshaper.reshape(paragraph)
+        words = reshaped.split()
+        lines = [' '.join(words[start:stop])
+                 for start, stop in break_lines(cache.widths(words, font_name, FONT_SIZE), space, WIDTH)]
+        assert lines == simpleSplit(reshaped, font_name, FONT_SIZE, WIDTH)
+
+
+@pytest.mark.parametrize("paragraph", [
+    "Plain ASCII text, with digits 12345 and punctuation (like this).",
+    "Accented Latin: café, naïve, Ærøskøbing, straße",
+    "Greek and Cyrillic: αβγ δεζ, привет мир",
+    "Zero\u200bwidth space and soft\u00adhyphen",
+    "A lone \ud800 surrogate",
+    "Outside the BMP: \U0001F600 \U0001D400",
+    "Left\u202eoverride\u202c and embedding \u202bx\u202c",
+    "Hebrew שלום in English",
+    "نص عربي مع English words و 123 أرقام",
+    "أرقام عربية ٣٤٥ فقط",
+    "١٢٣ ٤٥٦",
+    "   ",
+    "x" * 500,
+])
+def test_script_fast_path_matches_full_shaping(paragraph, font_name):
+    cache = WordWidthCache()
+    words = arabic_reshaper.reshape(paragraph).split()
+    space = stringWidth(' ', font_name, FONT_SIZE)
+    ranges = break_lines(cache.widths(words, font_name, FONT_SIZE), space, WIDTH)
+    base_dir = paragraph_direction(' '.join(words))
+    expected = [get_display(' '.join(words[start:stop]), base_dir=base_dir) for start, stop in ranges]
+    assert wrap_paragraph(paragraph, font_name, FONT_SIZE, WIDTH, ShapingCache(), cache) == expected
+
+
+def test_parallel_shaping_matches_in_process(font_path, font_name):
+    text = make_corpus("mixed", 256 * 1024)
+    pool = ShapingPool(workers=2)
+    try:
+        lines = pool.wrap_text(text, font_path, FONT_SIZE, WIDTH)
+    finally:
+        pool.shutdown()
+    assert lines == wrap_text(text, font_name, FONT_SIZE, WIDTH, ShapingCache(), WordWidthCache())
+
+
+@pytest.mark.parametrize("align", ALIGNMENTS)
+def test_layout_session_matches_full_render(align, font_path):
+    settings = PDFSettings(text_align=align, font_path=font_path)
+    session = LayoutSession()
+    body = make_corpus("mixed", 24 * 1024)
+    render(Document(body=body, title="عنوان"), settings, layout_session=session, page_cache=None)
+    for edited in edits(body):
+        document = Document(body=edited, title="عنوان")
+        incremental, report = render(document, settings, layout_session=session, page_cache=None)
+        full, _ = render(document, settings, page_cache=None)
+        assert report.layout_stats["paragraphs_reused"] > 0
+        assert incremental == full
+
+
+@pytest.mark.parametrize("border", ["decorative", None])
+@pytest.mark.parametrize("align", ALIGNMENTS)
+def test_page_cache_matches_full_render(align, border, font_path):
+    settings = PDFSettings(text_align=align, font_path=font_path, border_style=border)
+    page_cache = PageContentCache()
+    body = make_corpus("mixed", 24 * 1024)
+    render(Document(body=body), settings, page_cache=page_cache)
+    reused = 0
+    for edited in edits(body):
+        cached, report = render(Document(body=edited), settings, page_cache=page_cache)
+        full, _ = render(Document(body=edited), settings, page_cache=None)
+        reused += report.pages_reused
+        assert cached == full
+    assert reused > 0
+
+
+@pytest.mark.parametrize("border", ["decorative", None])
+@pytest.mark.parametrize("shape", ["mixed", "short_lines"])
+def test_stamped_footers_match_inline_footers(shape, border, font_path, font_name):
+    settings = PDFSettings(font_path=font_path, border_style=border)
+    document = Document(body=make_corpus(shape, 24 * 1024), title="عنوان")
+    streamed, report = render(document, settings)
+    inline = BytesIO()
+    render_layout(layout_document(document, settings, font_name), settings, inline)
+    assert report.page_count > 1
+    assert streamed == inline.getvalue()
+
+
+def test_stamp_footers_refuses_unexpected_page_streams(font_path, font_name):
+    settings = PDFSettings(font_path=font_path)
+    layout = layout_document(Document(body="نص"), settings, font_name)
+    c = canvas.Canvas(BytesIO())
+    c.drawString(10, 10, "page one")
+    c.showPage()
+    c._doc.Pages.pages[0].stream += "trailing"
+    with pytest.raises(RuntimeError):
+        stamp_footers(c, layout, 2)
@@ -0,0 +1,122 @@
+"""Background render scheduler: FIFO admission, memory gating, queue positions and cancel"""
+import threading
+import time
+
+import pytest
+
+from pdfbuilder import BackgroundRenderer, Document, PDFSettings, estimate_render_bytes
+from pdfbuilder.render import RenderCancelled
+
+SETTINGS = PDFSettings()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Renders:
+    """Stub render function: records starts and blocks each document until released"""
+
+    def __init__(self):
+        self.started = []
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, document, settings, progress):
+        with self.lock:
+            self.started.append(document.body)
+            event = self.events.setdefault(document.body, threading.Event())
+        while not event.wait(0.01):
+            progress.check()
+        progress.check()
+        return document.body
+
+    def release(self, body):
+        with self.lock:
+            self.events.setdefault(body, threading.Event()).set()
+
+
+@pytest.fixture
+def renders():
+    renders = Renders()
+    yield renders
+    # Let anything still blocked finish so worker threads exit
+    for body in list(renders.events):
+        renders.release(body)
+
+
+def test_jobs_start_in_submission_order_with_queue_positions(renders):
+    scheduler = BackgroundRenderer(max_workers=1)
+    jobs = [scheduler.submit(renders, Document(body=name), SETTINGS) for name in "abc"]
+    wait_for(lambda: renders.started == ["a"])
+    assert [job.position for job in jobs] == [0, 1, 2]
+
+    renders.release("a")
+    wait_for(lambda: renders.started == ["a", "b"])
+    assert [job.position for job in jobs[1:]] == [0, 1]
+
+    renders.release("b")
+    renders.release("c")
+    assert [job.result() for job in jobs] == ["a", "b", "c"]
+    assert renders.started == ["a", "b", "c"]
+    assert scheduler.stats() == {"running": 0, "queued": 0, "reserved_bytes": 0, "admitted": 3, "completed": 3}
+
+
+def test_memory_budget_holds_back_large_jobs_without_overtaking(renders):
+    small, large = Document(body="small"), Document(body="large " * 200_000)
+    # Room for the large job alone, but not alongside anything else
+    scheduler = BackgroundRenderer(max_workers=4, memory_budget=estimate_render_bytes(large, SETTINGS))
+    first = scheduler.submit(renders, small, SETTINGS)
+    big = scheduler.submit(renders, large, SETTINGS)
+    second = scheduler.submit(renders, Document(body="small too"), SETTINGS)
+    wait_for(lambda: renders.started == ["small"])
+    # The second small job would fit, but waits behind the large one
+    assert (big.position, second.position) == (1, 2)
+    assert scheduler.stats()["running"] == 1
+
+    renders.release("small")
+    wait_for(lambda: len(renders.started) == 2)
+    assert renders.started[1] == large.body and second.position == 1
+    assert scheduler.stats()["reserved_bytes"] == big.estimated_bytes
+
+    renders.release(large.body)
+    renders.release("small too")
+    assert second.result() == "small too" and first.result() == "small"
+
+
+def test_oversized_job_runs_when_nothing_else_does(renders):
+    scheduler = BackgroundRenderer(max_workers=2, memory_budget=1)
+    job = scheduler.submit(renders, Document(body="any"), SETTINGS)
+    renders.release("any")
+    assert job.result() == "any"
+
+
+def test_cancelling_a_queued_job_drops_it(renders):
+    scheduler = BackgroundRenderer(max_workers=1)
+    running = scheduler.submit(renders, Document(body="a"), SETTINGS)
+    queued = scheduler.submit(renders, Document(body="b"), SETTINGS)
+    behind = scheduler.submit(renders, Document(body="c"), SETTINGS)
+    wait_for(lambda: renders.started == ["a"])
+
+    queued.cancel()
+    assert queued.cancelled() and queued.done()
+    assert behind.position == 1 and scheduler.stats()["queued"] == 1
+
+    renders.release("a")
+    renders.release("c")
+    assert behind.result() == "c" and running.result() == "a"
+    assert renders.started == ["a", "c"]
+
+
+def test_cancelling_a_running_job_stops_it(renders):
+    scheduler = BackgroundRenderer(max_workers=1)
+    job = scheduler.submit(renders, Document(body="a"), SETTINGS)
+    wait_for(lambda: renders.started == ["a"])
+    job.cancel()
+    with pytest.raises(RenderCancelled):
+        job.future.result(timeout=5)
+    assert job.cancelled()
+    wait_for(lambda: scheduler.stats()["running"] == 0)
@@ -0,0 +1,56 @@
+"""Page content cache: falls back to drawing when reportlab internals are not as expected"""
+from io import BytesIO
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from pdfbuilder import PageContentCache
+
+
+def draw_twice(cache, font_name, make_canvas):
+    calls = []
+    results = []
+    for _ in range(2):
+        c = make_canvas()
+        results.append(cache.draw(c, font_name, "key", ["text"], lambda: calls.append(c)))
+    return results, len(calls)
+
+
+def test_reuses_drawn_text(font_name):
+    def make_canvas():
+        c = canvas.Canvas(BytesIO())
+        c.setFont(font_name, 12)
+        return c
+    cache = PageContentCache()
+    calls = []
+    for _ in range(2):
+        c = make_canvas()
+        reused = cache.draw(c, font_name, "key", ["text"], lambda: (calls.append(1), c.drawString(10, 10, "text")))
+    assert reused and len(calls) == 1
+
+
+def test_canvas_without_internals_is_drawn(font_name):
+    class PlainCanvas:
+        """A canvas that keeps its operators somewhere the cache cannot see"""
+    cache = PageContentCache()
+    results, calls = draw_twice(cache, font_name, PlainCanvas)
+    assert results == [False, False] and calls == 2
+    assert cache.stats()["pages"] == 0
+
+
+def test_font_state_without_assignments_is_drawn(font_name, monkeypatch):
+    font = pdfmetrics.getFont(font_name)
+
+    class State:
+        """Font state of a reportlab version that tracks subsets differently"""
+
+    monkeypatch.setattr(font, "state", {})
+    monkeypatch.setattr(font, "splitString", lambda text, doc: font.state.setdefault(doc, State()))
+    cache = PageContentCache()
+
+    def make_canvas():
+        c = canvas.Canvas(BytesIO())
+        font.state[c._doc] = State()
+        return c
+    results, calls = draw_twice(cache, font_name, make_canvas)
+    assert results == [False, False] and calls == 2
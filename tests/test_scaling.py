@@ -0,0 +1,16 @@
+"""Smoke version of benchmarks/check_scaling.py: small sizes, one shape per alignment"""
+import pytest
+
+from benchmarks.check_scaling import growth_exponent, measure
+from pdfbuilder import ALIGNMENTS
+
+SIZES = [16 * 1024, 32 * 1024, 64 * 1024]
+# Fixed per-render costs flatten the slope at these sizes, noise steepens it; quadratic stages still show
+TOLERANCE = 0.5
+
+
+@pytest.mark.parametrize("align", ALIGNMENTS)
+def test_render_scales_linearly(align, font_path):
+    series = measure("long_paragraphs", align, SIZES, font_path, repeat=1, seed=0)
+    for name in ("total", "peak_memory"):
+        assert growth_exponent(SIZES, series[name]) <= 1 + TOLERANCE, name
@@ -0,0 +1,59 @@
+"""Render service: bad specs are answered with 400 before using a worker"""
+import asyncio
+import json
+
+import pytest
+
+from pdfbuilder import PDFSettings
+from pdfbuilder.server import RenderServer
+
+
+async def post(port, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    writer.write(b"POST /render HTTP/1.1\r\nHost: test\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), dict(line.split(": ", 1) for line in head.decode().split("\r\n")[1:]), content
+
+
+def serve(font_path, requests, start_pool=False):
+    """Run a RenderServer on a free port, send each payload and return the responses"""
+    async def run():
+        server = RenderServer(PDFSettings(font_path=font_path), workers=1, queue_size=1)
+        if start_pool:
+            server.start_pool()
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return server, [await post(port, payload) for payload in requests]
+        finally:
+            listener.close()
+            if server.pool is not None:
+                server.pool.shutdown()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("payload", [
+    {"body": ""},
+    {"body": "   \n "},
+    {"body": 42},
+    {"title": "no body"},
+    {"body": "text", "margins": [35]},
+    [1, 2],
+    b"{not json",
+])
+def test_invalid_spec_is_a_client_error(payload, font_path):
+    # No pool is started: a request that reached a worker would fail with 500
+    server, [(status, _, content)] = serve(font_path, [payload])
+    assert status == 400
+    assert "error" in json.loads(content)
+    assert server.pending == 0 and server.renders == 0
+
+
+def test_valid_spec_renders(font_path):
+    _, [(status, headers, content)] = serve(font_path, [{"body": "نص المستند", "title": "عنوان"}], start_pool=True)
+    assert status == 200
+    assert content.startswith(b"%PDF") and int(headers["X-Page-Count"]) == 1
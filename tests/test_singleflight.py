@@ -0,0 +1,139 @@
+"""Coalescing of identical concurrent calls and renders"""
+import os
+import threading
+import time
+
+import pytest
+
+from pdfbuilder import ArtifactCache, Document, PDFSettings
+from pdfbuilder.render import RenderCancelled, RenderProgress
+from pdfbuilder.singleflight import SingleFlight
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def start(target, *args, **kwargs):
+    """Run target in a thread; returns (thread, outcome) where outcome gets "result" or "error" """
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = target(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    runs = [start(flights.do, "key", fn) for _ in range(4)]
+    wait_for(lambda: flights.coalesced == 3)
+    release.set()
+    for thread, _ in runs:
+        thread.join()
+    results = [outcome["result"] for _, outcome in runs]
+    assert len(calls) == 1
+    assert len({id(value) for value, _ in results}) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert flights.in_flight() == 0
+
+    # Calls that do not overlap run again
+    flights.do("key", fn)
+    assert len(calls) == 2
+
+
+def test_leader_error_reaches_followers():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise KeyError("boom")
+
+    runs = [start(flights.do, "key", fn) for _ in range(2)]
+    wait_for(lambda: flights.coalesced == 1)
+    release.set()
+    for thread, outcome in runs:
+        thread.join()
+        assert isinstance(outcome["error"], KeyError)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, font_path):
+    """An ArtifactCache whose renders block until released and record who ran them"""
+    cache = ArtifactCache(str(tmp_path))
+    cache.flights.poll_interval = 0.01
+    cache.calls = []
+    cache.release = threading.Event()
+
+    def render_miss(key, document, settings, progress, layout_session=None):
+        cache.calls.append(progress)
+        cache.release.wait(5)
+        progress.check()
+        return str(tmp_path / f"{len(cache.calls)}.pdf"), len(cache.calls)
+
+    monkeypatch.setattr(cache, "_render_miss", render_miss)
+    cache.request = (Document(body="نص"), PDFSettings(font_path=font_path))
+    return cache
+
+
+def test_identical_renders_run_once(cache):
+    # Each waiter gets the leader's result; a cache hit would report True instead
+    runs = [start(cache.render, *cache.request) for _ in range(3)]
+    wait_for(lambda: cache.flights.coalesced == 2)
+    cache.release.set()
+    for thread, _ in runs:
+        thread.join()
+    assert len(cache.calls) == 1
+    assert {outcome["result"] for _, outcome in runs} == {(os.path.join(cache.directory, "1.pdf"), 1, False)}
+    assert cache.stats()["coalesced"] == 2
+
+
+def test_follower_renders_itself_after_leader_is_cancelled(cache):
+    leader_progress = RenderProgress()
+    leader = start(cache.render, *cache.request, progress=leader_progress)
+    wait_for(lambda: len(cache.calls) == 1)
+    follower = start(cache.render, *cache.request)
+    wait_for(lambda: cache.flights.coalesced == 1)
+
+    leader_progress.cancel()
+    cache.release.set()
+    for thread, _ in (leader, follower):
+        thread.join()
+    assert isinstance(leader[1]["error"], RenderCancelled)
+    assert follower[1]["result"][1:] == (2, False)
+    assert len(cache.calls) == 2
+
+
+def test_cancelled_follower_stops_waiting(cache):
+    leader = start(cache.render, *cache.request)
+    wait_for(lambda: len(cache.calls) == 1)
+    follower_progress = RenderProgress()
+    follower = start(cache.render, *cache.request, progress=follower_progress)
+    wait_for(lambda: cache.flights.coalesced == 1)
+
+    follower_progress.cancel()
+    follower[0].join(5)
+    assert not follower[0].is_alive()
+    assert isinstance(follower[1]["error"], RenderCancelled)
+
+    # The leader is not affected
+    cache.release.set()
+    leader[0].join()
+    assert leader[1]["result"][1:] == (1, False)
+    assert len(cache.calls) == 1